@@ -1,15 +1,24 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, field_validator, model_validator
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Sequence, Union
 import pandas as pd
 import lxml.etree as ET
 from pathlib import Path
 import re
 import io
 import uuid
+import copy
 import os
-from collections import defaultdict
+import sys
+import logging
+import asyncio
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property, lru_cache
+from itertools import repeat
+from operator import itemgetter
 
 # Security constants
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
@@ -21,6 +30,17 @@ MAX_BATCH_FILES = 100000
 ROOT_DIRECTORY = os.environ.get('SCHMAPPER_ROOT_DIR', None)
 DEBUG = os.environ.get('SCHMAPPER_DEBUG', 'False').lower() == 'true'
 
+# Progress and diagnostics go to stderr: INFO (file/batch progress) by default,
+# everything with SCHMAPPER_DEBUG. Configured here so the server's (and pool
+# workers') logging setup doesn't decide whether batch progress is shown.
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG if DEBUG else logging.INFO)
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_log_handler)
+    logger.propagate = False
+
 app = FastAPI()
 
 # Configure CORS - use environment variable for allowed origins (security best practice)
@@ -38,6 +58,16 @@ app.add_middleware(
 # UTILITY FUNCTIONS
 # ============================================================================
 
+# Invalid filename chars (/ \ : * ? " < > |) and spaces all become underscores
+_SANITIZE = str.maketrans({c: '_' for c in '/\\:*?"<>| '})
+_UNDERSCORE_RUNS = re.compile(r'_+')
+_RESERVED_NAMES = frozenset({
+    'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4', 'COM5',
+    'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2', 'LPT3', 'LPT4',
+    'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'
+})
+
+
 def sanitize_filename(filename: str) -> str:
     r"""
     Sanitize a string to be safe for use as a folder or file name.
@@ -58,25 +88,17 @@ def sanitize_filename(filename: str) -> str:
     # Convert to string and strip whitespace
     filename = str(filename).strip()
 
-    # Replace invalid characters with underscore
-    # Invalid chars: / \ : * ? " < > |
-    invalid_chars = r'[/\\:*?"<>|]'
-    filename = re.sub(invalid_chars, '_', filename)
-
-    # Replace spaces with underscores
-    filename = filename.replace(' ', '_')
+    # Replace invalid characters and spaces with underscore in a single pass
+    filename = filename.translate(_SANITIZE)
 
     # Replace multiple consecutive underscores with single underscore
-    filename = re.sub(r'_+', '_', filename)
+    filename = _UNDERSCORE_RUNS.sub('_', filename)
 
     # Remove leading/trailing underscores
     filename = filename.strip('_')
 
     # Ensure not empty and not a reserved Windows name
-    reserved_names = {'CON', 'PRN', 'AUX', 'NUL', 'COM1', 'COM2', 'COM3', 'COM4', 'COM5',
-                      'COM6', 'COM7', 'COM8', 'COM9', 'LPT1', 'LPT2', 'LPT3', 'LPT4',
-                      'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'}
-    if filename.upper() in reserved_names:
+    if filename.upper() in _RESERVED_NAMES:
         filename = f"_{filename}"
 
     return filename
@@ -95,6 +117,12 @@ class SchemaField(BaseModel):
     maxOccurs: Optional[str] = "1"
     order: Optional[int] = 999999  # XSD sequence order for correct element positioning
 
+    @field_validator('path')
+    @classmethod
+    def intern_path(cls, v: str) -> str:
+        """Intern paths so per-record dict lookups on them compare by identity"""
+        return sys.intern(v)
+
 class Schema(BaseModel):
     name: str
     type: str
@@ -102,6 +130,10 @@ class Schema(BaseModel):
     repeating_elements: Optional[List[Dict[str, Any]]] = []
     namespace: Optional[str] = None
 
+    # Per-instance caches for XML creation (private attributes, not serialized)
+    _path_parts: Optional[Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]] = None
+    _xml_plan: Optional[Tuple[List[SchemaField], Set[str]]] = None
+
 class MappingParams(BaseModel):
     separator: Optional[str] = None
     from_: Optional[str] = None
@@ -120,6 +152,13 @@ class MappingCondition(BaseModel):
     operator: str  # "equals", "contains", "startswith", "regex", "exists"
     value: Optional[str] = None  # Value to compare against (not needed for "exists")
 
+    @cached_property
+    def compiled(self) -> Optional[re.Pattern]:
+        """Compiled pattern for the "regex" operator (compiled on first use)"""
+        if self.operator != "regex":
+            return None
+        return re.compile(self.value)
+
 class Mapping(BaseModel):
     id: str
     source: List[str]
@@ -137,6 +176,17 @@ class Mapping(BaseModel):
     repeat_to_single: Optional[bool] = False
     conditions: Optional[List[MappingCondition]] = None  # Filter conditions for conditional mapping
 
+    @field_validator('source')
+    @classmethod
+    def intern_source_ids(cls, v: List[str]) -> List[str]:
+        """Intern field IDs used as lookup keys on every row"""
+        return [sys.intern(src_id) for src_id in v]
+
+    @field_validator('target')
+    @classmethod
+    def intern_target_id(cls, v: str) -> str:
+        return sys.intern(v)
+
     @model_validator(mode='before')
     @classmethod
     def extract_params_from_transforms(cls, data):
@@ -313,44 +363,93 @@ class PathMatcher:
     
     def __init__(self):
         self._cache: Dict[str, Dict[str, Optional[str]]] = {}
+        self._compiled: Dict[Tuple[str, Optional[str], bool], Callable[[Dict[str, str]], Optional[str]]] = {}
     
-    def find_value(self, data: Dict[str, str], field_path: str, field_name: str = None) -> Optional[str]:
+    def find_value(self, data: Dict[str, str], field_path: str, field_name: str = None,
+                   suffix_match: bool = False) -> Optional[str]:
         """
         Find a value in data using multiple matching strategies.
+
+        With suffix_match=True, data is expected to hold full paths only
+        (no partial-path copies); a path then also matches any key ending
+        in "/<path>", as long as it is not a bare tag name. The most recently
+        written match wins, in the order of data's write_log if it has one
+        (see InstanceData), else in insertion order.
+        """
+        return self.compile(field_path, field_name, suffix_match)(data)
+    
+    def compile(self, field_path: str, field_name: str = None,
+                suffix_match: bool = False) -> Callable[[Dict[str, str]], Optional[str]]:
         """
+        Build (once per field) a lookup function equivalent to find_value,
+        with the keys to try and their order worked out up front.
+        """
+        cache_key = (field_path, field_name, suffix_match)
+        lookup = self._compiled.get(cache_key)
+        if lookup is None:
+            lookup = self._compiled[cache_key] = self._build_lookup(field_path, field_name, suffix_match)
+        return lookup
+    
+    @staticmethod
+    def _build_lookup(field_path: str, field_name: Optional[str],
+                      suffix_match: bool) -> Callable[[Dict[str, str]], Optional[str]]:
+        def suffix_for(key: str) -> Optional[str]:
+            if not suffix_match:
+                return None
+            segments = key.split('/')
+            element_segments = len(segments) - (1 if segments[-1].startswith('@') else 0)
+            return '/' + key if element_segments >= 2 else None
+        
         # Strategy 1: Exact path match
-        if field_path in data:
-            return data[field_path]
+        candidates = [(field_path, suffix_for(field_path))]
         
         # Strategy 2: Field name match
-        if field_name and field_name in data:
-            return data[field_name]
+        if field_name:
+            candidates.append((field_name, None))
         
-        # Strategy 3: Partial paths (from end to beginning)
+        # Strategy 3: Partial paths (from end to beginning); the first is the exact path again
         path_parts = field_path.split('/')
-        for i in range(len(path_parts)):
+        for i in range(1, len(path_parts)):
             partial = '/'.join(path_parts[i:])
-            if partial in data:
-                return data[partial]
+            candidates.append((partial, suffix_for(partial)))
         
         # Strategy 4: Case-insensitive field name match
-        if field_name:
-            field_name_lower = field_name.lower()
-            for key in data:
-                key_last_part = key.split('/')[-1].lower()
-                if key_last_part == field_name_lower:
+        field_name_lower = field_name.lower() if field_name else None
+        
+        def lookup(data: Dict[str, str]) -> Optional[str]:
+            for key, suffix in candidates:
+                if key in data:
                     return data[key]
+                if suffix is not None:
+                    # Most recently written match wins, like the overwritten partial-path keys did
+                    for k in reversed(getattr(data, 'write_log', None) or data):
+                        if k.endswith(suffix):
+                            return data[k]
+            
+            if field_name_lower:
+                for key in data:
+                    if key.rpartition('/')[2].lower() == field_name_lower:
+                        return data[key]
+            
+            return None
         
-        return None
+        return lookup
     
     def clear_cache(self):
         self._cache.clear()
+        self._compiled.clear()
 
 
 # Global path matcher
 path_matcher = PathMatcher()
 
 
+@lru_cache(maxsize=1024)
+def _local_name(tag: str) -> str:
+    """Strip the '{namespace}' prefix from an element tag."""
+    return tag.rpartition('}')[2]
+
+
 # ============================================================================
 # ELEMENT ORDER TRACKING (NEW)
 # ============================================================================
@@ -393,6 +492,8 @@ class ElementOrderTracker:
 
         self.field_paths = [e['path'] for e in all_elements]
         self._path_to_index = {path: i for i, path in enumerate(self.field_paths)}
+        # (parent_path, tag) -> order index; partial matches scan every path
+        self._child_order_cache: Dict[Tuple[str, str], int] = {}
 
         if DEBUG:
             print(f"[ORDER TRACKER] Initialized with {len(self.field_paths)} paths (sorted by XSD order)")
@@ -416,26 +517,30 @@ class ElementOrderTracker:
         Calculate correct insertion index for a child element.
         Returns the index where the new element should be inserted.
         """
-        child_path = f"{parent_path}/{child_tag}" if parent_path else child_tag
-        target_order = self.get_order_index(child_path)
+        child_order = self._child_order
+        target_order = child_order(parent_path, child_tag)
         
         for i, existing_child in enumerate(parent):
-            existing_tag = existing_child.tag.split('}')[-1] if '}' in existing_child.tag else existing_child.tag
-            existing_path = f"{parent_path}/{existing_tag}" if parent_path else existing_tag
-            existing_order = self.get_order_index(existing_path)
-            
-            if target_order < existing_order:
+            if target_order < child_order(parent_path, _local_name(existing_child.tag)):
                 return i
         
         return len(parent)
     
+    def _child_order(self, parent_path: str, tag: str) -> int:
+        """Memoized get_order_index for the child path parent_path/tag."""
+        key = (parent_path, tag)
+        order = self._child_order_cache.get(key)
+        if order is None:
+            order = self._child_order_cache[key] = self.get_order_index(f"{parent_path}/{tag}" if parent_path else tag)
+        return order
+    
     def find_or_create_with_order(self, parent: ET._Element, tag: str, parent_path: str = "") -> ET._Element:
         """
         Find existing child or create new one at correct position.
         """
         # Check if exists
         for child in parent:
-            child_tag = child.tag.split('}')[-1] if '}' in child.tag else child.tag
+            child_tag = _local_name(child.tag)
             if child_tag == tag:
                 return child
         
@@ -1207,11 +1312,32 @@ async def parse_xsd_schema(file: UploadFile = File(...)):
 # TRANSFORM FUNCTIONS (unchanged)
 # ============================================================================
 
+# Accepted boolean spellings (built once at import, O(1) membership)
+_TRUE_SET = frozenset(('true', '1', 'yes', 'ja'))
+_FALSE_SET = frozenset(('false', '0', 'no', 'nej'))
+
+_DIGITS_RE = re.compile(r'\d+')
+_DOLLAR_REF_RE = re.compile(r'\$(\d)')
+
+
+@lru_cache(maxsize=256)
+def _compile_regex(pattern: str, replacement: str):
+    """Compile a regex transform once, converting $0-$9 back-references to Python's \\0-\\9."""
+    return re.compile(pattern), _DOLLAR_REF_RE.sub(r'\\\1', replacement)
+
+
+@lru_cache(maxsize=256)
+def _compile_format(split_at: str) -> Tuple[Tuple[int, ...], Tuple[Optional[int], ...]]:
+    """Parse a format transform's comma-separated split positions into slice bounds once."""
+    positions = tuple(int(x.strip()) for x in split_at.split(','))
+    return (0,) + positions, positions + (None,)
+
+
 def validate_and_transform_value(value: str, field_type: str, field_name: str) -> str:
-    if not value or value == '':
+    if not value:
         return ''
     
-    value_str = str(value).strip()
+    value_str = value.strip() if isinstance(value, str) else str(value).strip()
     
     try:
         if field_type in ['string', 'xs:string']:
@@ -1225,7 +1351,7 @@ def validate_and_transform_value(value: str, field_type: str, field_name: str) -
                     datetime.strptime(value_str, '%Y-%m-%d')
                     return value_str
                 except ValueError:
-                    print(f"  [VALIDATION WARNING] Invalid date '{value_str}' for {field_name}")
+                    logger.warning("  [VALIDATION WARNING] Invalid date '%s' for %s", value_str, field_name)
                     return ''
             else:
                 if re.match(r'^\d{8}$', value_str):
@@ -1233,180 +1359,280 @@ def validate_and_transform_value(value: str, field_type: str, field_name: str) -
                         return f"{value_str[0:4]}-{value_str[4:6]}-{value_str[6:8]}"
                     except:
                         pass
-                print(f"  [VALIDATION WARNING] Date '{value_str}' for {field_name} doesn't match format")
+                logger.warning("  [VALIDATION WARNING] Date '%s' for %s doesn't match format", value_str, field_name)
                 return ''
         
         elif field_type in ['dateTime', 'xs:dateTime']:
             if re.match(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}', value_str):
                 return value_str
             else:
-                print(f"  [VALIDATION WARNING] DateTime '{value_str}' for {field_name} doesn't match format")
+                logger.warning("  [VALIDATION WARNING] DateTime '%s' for %s doesn't match format", value_str, field_name)
                 return ''
         
         elif field_type in ['int', 'integer', 'xs:int', 'xs:integer']:
+            # Fast path: plain (optionally negative) digit strings need no int() round-trip
+            if value_str.isdecimal() or (value_str[:1] == '-' and value_str[1:].isdecimal()):
+                return value_str
             try:
                 int(value_str)
                 return value_str
             except ValueError:
-                numbers = re.findall(r'\d+', value_str)
+                numbers = _DIGITS_RE.findall(value_str)
                 if numbers:
-                    print(f"  [VALIDATION WARNING] Extracted integer '{numbers[0]}' from '{value_str}'")
+                    logger.warning("  [VALIDATION WARNING] Extracted integer '%s' from '%s'", numbers[0], value_str)
                     return numbers[0]
-                print(f"  [VALIDATION WARNING] Value '{value_str}' is not integer")
+                logger.warning("  [VALIDATION WARNING] Value '%s' is not integer", value_str)
                 return ''
         
         elif field_type in ['decimal', 'float', 'double', 'xs:decimal', 'xs:float', 'xs:double']:
+            unsigned = value_str[1:] if value_str[:1] == '-' else value_str
+            if unsigned.replace('.', '', 1).isdecimal():
+                return value_str
             try:
                 float(value_str)
                 return value_str
             except ValueError:
-                print(f"  [VALIDATION WARNING] Value '{value_str}' is not number")
+                logger.warning("  [VALIDATION WARNING] Value '%s' is not number", value_str)
                 return ''
         
         elif field_type in ['boolean', 'xs:boolean']:
             lower_val = value_str.lower()
-            if lower_val in ['true', '1', 'yes', 'ja']:
+            if lower_val in _TRUE_SET:
                 return 'true'
-            elif lower_val in ['false', '0', 'no', 'nej']:
+            if lower_val in _FALSE_SET:
                 return 'false'
-            else:
-                print(f"  [VALIDATION WARNING] Value '{value_str}' is not boolean")
-                return ''
+            logger.warning("  [VALIDATION WARNING] Value '%s' is not boolean", value_str)
+            return ''
         
         else:
             cleaned = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', value_str)
             return cleaned
             
     except Exception as e:
-        print(f"  [VALIDATION ERROR] Error validating '{value_str}': {e}")
+        logger.warning("  [VALIDATION ERROR] Error validating '%s': %s", value_str, e)
         return ''
 
 
-def apply_transform(value: str, transform: str, params: Dict[str, Any]) -> str:
-    if not value:
-        value = ""
-    
-    if transform == 'none':
+def _transform_uppercase(value: str, params: Dict[str, Any]) -> str:
+    return value.upper()
+
+
+def _transform_lowercase(value: str, params: Dict[str, Any]) -> str:
+    return value.lower()
+
+
+def _transform_trim(value: str, params: Dict[str, Any]) -> str:
+    return value.strip()
+
+
+def _transform_replace(value: str, params: Dict[str, Any]) -> str:
+    from_val = params.get('from_', params.get('from', ''))
+    to_val = params.get('to', '')
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("  [TRANSFORM DEBUG] Replace params: from_='%s' (type: %s), to='%s'",
+                     from_val, type(from_val).__name__, to_val)
+
+    # Ensure strings (not None)
+    if from_val is None:
+        from_val = ''
+    if to_val is None:
+        to_val = ''
+
+    if from_val and len(from_val) > MAX_REGEX_LENGTH:
+        logger.warning("  [TRANSFORM ERROR] 'from' value too long")
         return value
-    
-    elif transform == 'uppercase':
-        return value.upper()
-    
-    elif transform == 'lowercase':
-        return value.lower()
-    
-    elif transform == 'trim':
-        return value.strip()
-    
-    elif transform == 'replace':
-        from_val = params.get('from_', params.get('from', ''))
-        to_val = params.get('to', '')
 
-        if DEBUG:
-            print(f"  [TRANSFORM DEBUG] Replace params: from_='{from_val}' (type: {type(from_val).__name__}), to='{to_val}'")
+    if from_val:
+        result = value.replace(from_val, to_val)
+        logger.debug("  [TRANSFORM] Replace: '%s' -> '%s'", value, result)
+        return result
+    return value
 
-        # Ensure strings (not None)
-        if from_val is None:
-            from_val = ''
-        if to_val is None:
-            to_val = ''
 
-        if from_val and len(from_val) > MAX_REGEX_LENGTH:
-            print(f"  [TRANSFORM ERROR] 'from' value too long")
-            return value
+def _transform_regex(value: str, params: Dict[str, Any]) -> str:
+    pattern = params.get('pattern', '') or ''
+    replacement = params.get('replacement', '') or ''
 
-        if from_val:
-            result = value.replace(from_val, to_val)
-            if DEBUG:
-                print(f"  [TRANSFORM] Replace: '{value}' -> '{result}'")
-            return result
+    if pattern and len(pattern) > MAX_REGEX_LENGTH:
+        logger.warning("  [TRANSFORM ERROR] Regex pattern too long")
         return value
-    
-    elif transform == 'regex':
-        pattern = params.get('pattern', '') or ''
-        replacement = params.get('replacement', '') or ''
 
-        if pattern and len(pattern) > MAX_REGEX_LENGTH:
-            print(f"  [TRANSFORM ERROR] Regex pattern too long")
+    if pattern:
+        try:
+            compiled, python_replacement = _compile_regex(pattern, replacement)
+            return compiled.sub(python_replacement, value)
+        except Exception as e:
+            logger.warning("  [TRANSFORM ERROR] Regex failed: %s", e)
             return value
+    return value
 
-        if pattern:
-            try:
-                python_replacement = replacement
-                for i in range(10):
-                    python_replacement = python_replacement.replace(f'${i}', f'\\{i}')
 
-                return re.sub(pattern, python_replacement, value)
-            except Exception as e:
-                print(f"  [TRANSFORM ERROR] Regex failed: {e}")
-                return value
-        return value
-    
-    elif transform == 'format':
-        format_string = params.get('format', '') or ''
-        if format_string:
-            try:
-                split_at = params.get('split_at', '') or ''
-                if split_at:
-                    positions = [int(x.strip()) for x in split_at.split(',')]
-                    parts = []
-                    last_pos = 0
-                    for pos in positions:
-                        parts.append(value[last_pos:pos])
-                        last_pos = pos
-                    parts.append(value[last_pos:])
-                    return format_string.format(*parts)
-                else:
-                    return format_string.format(value)
-            except Exception as e:
-                print(f"  [TRANSFORM ERROR] Format failed: {e}")
-                return value
+def _transform_format(value: str, params: Dict[str, Any]) -> str:
+    format_string = params.get('format', '') or ''
+    if format_string:
+        try:
+            split_at = params.get('split_at', '') or ''
+            if split_at:
+                starts, ends = _compile_format(split_at)
+                return format_string.format(*[value[a:b] for a, b in zip(starts, ends)])
+            else:
+                return format_string.format(value)
+        except Exception as e:
+            logger.warning("  [TRANSFORM ERROR] Format failed: %s", e)
+            return value
+    return value
+
+
+def _transform_default(value: str, params: Dict[str, Any]) -> str:
+    return value if value else (params.get('defaultValue', '') or '')
+
+
+def _transform_sanitize(value: str, params: Dict[str, Any]) -> str:
+    allowed_chars = params.get('allowed_chars', 'a-zA-Z0-9\\s\\-_.,') or 'a-zA-Z0-9\\s\\-_.,'
+    pattern = f'[^{allowed_chars}]'
+    return re.sub(pattern, '', value)
+
+
+_TRANSFORM_DISPATCH = {
+    'uppercase': _transform_uppercase,
+    'lowercase': _transform_lowercase,
+    'trim': _transform_trim,
+    'replace': _transform_replace,
+    'regex': _transform_regex,
+    'format': _transform_format,
+    'default': _transform_default,
+    'sanitize': _transform_sanitize,
+}
+
+
+def apply_transform(value: str, transform: str, params: Dict[str, Any]) -> str:
+    if not value:
+        value = ""
+
+    # 'none' and unknown transforms leave the value unchanged
+    transform_fn = _TRANSFORM_DISPATCH.get(transform)
+    return transform_fn(value, params) if transform_fn else value
+
+
+def _build_transformer(
+    transforms: List[str],
+    params: Dict[str, Any],
+    field_type: Optional[str] = None,
+    field_name: str = ""
+) -> Callable[[str], str]:
+    """
+    Compose a mapping's transform chain once so it can be reused per value.
+
+    The returned callable applies transforms in order ('none' and unknown
+    transforms are dropped up front) and, if field_type is given, finishes
+    with validate_and_transform_value for the target field.
+    """
+    steps = tuple(_TRANSFORM_DISPATCH[t] for t in transforms if t in _TRANSFORM_DISPATCH)
+
+    def transformer(value: str) -> str:
+        for step in steps:
+            value = step(value or "", params)
+        if field_type is not None:
+            value = validate_and_transform_value(value, field_type, field_name)
         return value
-    
-    elif transform == 'default':
-        return value if value else (params.get('defaultValue', '') or '')
 
-    elif transform == 'sanitize':
-        allowed_chars = params.get('allowed_chars', 'a-zA-Z0-9\\s\\-_.,') or 'a-zA-Z0-9\\s\\-_.,'
-        pattern = f'[^{allowed_chars}]'
-        return re.sub(pattern, '', value)
-    
-    return value
+    return transformer
 
 
 # ============================================================================
 # MAPPING APPLICATION (IMPROVED PATH MATCHING)
 # ============================================================================
 
-def apply_mappings_to_row(row: Dict, mappings: List[Mapping], source_schema: Schema, target_schema: Schema, constants: List[Constant] = None) -> Dict[str, str]:
+def _to_str(value: Any) -> str:
+    """str(value), skipping the call for values that already are exact strings."""
+    return value if type(value) is str else str(value)
+
+
+def schema_field_from_dict(field: Dict[str, Any]) -> SchemaField:
+    """
+    Normalize a repeating-element field dict into a SchemaField so lookups on
+    the hot path can use plain attribute access without isinstance checks.
+    """
+    return SchemaField(
+        id=field['id'],
+        name=field.get('name') or '',
+        type=field.get('type') or 'string',
+        path=field.get('path') or '',
+        order=field.get('order', 999999)
+    )
+
+
+class CompiledMappingSet:
+    """
+    Field/constant lookups and the filtered direct mapping list for a batch.
+
+    Everything here depends only on the request (mappings + schemas + constants),
+    so it is built once per batch instead of once per row.
+    """
+
+    def __init__(self, mappings: List[Mapping], source_schema: Schema, target_schema: Schema, constants: List[Constant] = None):
+        self.source_fields_by_id = {f.id: f for f in source_schema.fields}
+        self.target_fields_by_id = {f.id: f for f in target_schema.fields}
+        self.constants_by_id = {c.id: c for c in (constants or [])}
+        self.constant_values_by_id = {c.id: _to_str(c.value) for c in (constants or [])}
+
+        # Add repeating element fields to lookups
+        if source_schema.repeating_elements:
+            for rep_elem in source_schema.repeating_elements:
+                for field in rep_elem.get('fields', []):
+                    if field.get('id'):
+                        self.source_fields_by_id[field['id']] = schema_field_from_dict(field)
+
+        if target_schema.repeating_elements:
+            for rep_elem in target_schema.repeating_elements:
+                for field in rep_elem.get('fields', []):
+                    if field.get('id'):
+                        self.target_fields_by_id[field['id']] = schema_field_from_dict(field)
+
+        # Skip container mappings and child mappings (those with parent_repeat_container)
+        self.active_mappings = [m for m in mappings if not m.is_container and not m.parent_repeat_container]
+
+        # Path matcher specialized per source field that a direct mapping reads
+        self.row_lookups_by_id = {}
+        for m in self.active_mappings:
+            for src_id in m.source:
+                field = self.source_fields_by_id.get(src_id)
+                if field is not None and src_id not in self.row_lookups_by_id:
+                    self.row_lookups_by_id[src_id] = path_matcher.compile(field.path, field.name)
+
+        # Transform params serialized once per mapping (read-only for transforms)
+        self.params_by_id = {m.id: m.params.dict() for m in mappings}
+
+        # mapping id -> (has_concat, concat separator, transforms without concat/'none')
+        self.transforms_by_id = {}
+        for m in mappings:
+            transforms = m.transforms if m.transforms else ([m.transform] if m.transform else [])
+            separator = m.params.separator if m.params.separator is not None else ' '
+            self.transforms_by_id[m.id] = (
+                'concat' in transforms,
+                separator,
+                [t for t in transforms if t and t != 'none' and t != 'concat']
+            )
+
+
+def apply_mappings_to_row(row: Dict, compiled: CompiledMappingSet) -> Dict[str, str]:
     """Apply mappings with IMPROVED path matching"""
     result = {}
     
-    source_fields_by_id = {f.id: f for f in source_schema.fields}
-    target_fields_by_id = {f.id: f for f in target_schema.fields}
-    constants_by_id = {c.id: c for c in (constants or [])}
-    
-    # Add repeating element fields to lookups
-    if source_schema.repeating_elements:
-        for rep_elem in source_schema.repeating_elements:
-            for field in rep_elem.get('fields', []):
-                if field.get('id'):
-                    source_fields_by_id[field['id']] = field
+    source_fields_by_id = compiled.source_fields_by_id
+    target_fields_by_id = compiled.target_fields_by_id
+    constants_by_id = compiled.constants_by_id
+    params_by_id = compiled.params_by_id
+    transforms_by_id = compiled.transforms_by_id
+    row_lookups_by_id = compiled.row_lookups_by_id
     
-    if target_schema.repeating_elements:
-        for rep_elem in target_schema.repeating_elements:
-            for field in rep_elem.get('fields', []):
-                if field.get('id'):
-                    target_fields_by_id[field['id']] = field
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("[MAPPING] Processing row with %s source values", len(row))
+        logger.debug("[MAPPING] Applying %s mappings", len(compiled.active_mappings))
     
-    print(f"\n[MAPPING] Processing row with {len(row)} source values")
-    print(f"[MAPPING] Applying {len(mappings)} mappings")
-    
-    for mapping in mappings:
-        # Skip container mappings and child mappings (those with parent_repeat_container)
-        if mapping.is_container or mapping.parent_repeat_container:
-            continue
-        
+    for mapping in compiled.active_mappings:
         source_values = []
         
         for src_id in mapping.source:
@@ -1414,86 +1640,357 @@ def apply_mappings_to_row(row: Dict, mappings: List[Mapping], source_schema: Sch
                 const = constants_by_id.get(src_id)
                 if const:
                     source_values.append(const.value)
-                    print(f"  [CONSTANT] {const.name} = '{const.value}'")
+                    if debug:
+                        logger.debug("  [CONSTANT] %s = '%s'", const.name, const.value)
                 else:
                     source_values.append('')
             else:
                 source_field = source_fields_by_id.get(src_id)
                 if not source_field:
-                    print(f"  [WARNING] Source field ID not found: {src_id}")
+                    logger.warning("  [WARNING] Source field ID not found: %s", src_id)
                     source_values.append('')
                     continue
                 
-                # Get field info (handle both dict and object)
-                if isinstance(source_field, dict):
-                    field_path = source_field.get('path', '')
-                    field_name = source_field.get('name', '')
-                else:
-                    field_path = source_field.path
-                    field_name = source_field.name
+                field_path = source_field.path
+                field_name = source_field.name
                 
                 # Use improved path matcher
-                value = path_matcher.find_value(row, field_path, field_name)
+                value = row_lookups_by_id[src_id](row)
                 
                 if value is not None:
-                    source_values.append(str(value))
-                    print(f"  [FIELD] {field_name} = '{value}' (found)")
+                    source_values.append(_to_str(value))
+                    if debug:
+                        logger.debug("  [FIELD] %s = '%s' (found)", field_name, value)
                 else:
-                    print(f"  [MISSING] {field_name} (path: {field_path}) NOT FOUND in source data")
-                    # Show similar keys for debugging
-                    similar_keys = [k for k in row.keys() if field_name.lower() in k.lower()][:5]
-                    if similar_keys:
-                        print(f"    Similar keys: {similar_keys}")
+                    if debug:
+                        logger.debug("  [MISSING] %s (path: %s) NOT FOUND in source data", field_name, field_path)
+                        # Show similar keys for debugging
+                        similar_keys = [k for k in row.keys() if field_name.lower() in k.lower()][:5]
+                        if similar_keys:
+                            logger.debug("    Similar keys: %s", similar_keys)
                     source_values.append('')
         
         # Apply transforms
-        transforms_to_apply = []
-        if mapping.transforms:
-            transforms_to_apply = mapping.transforms
-        elif mapping.transform:
-            transforms_to_apply = [mapping.transform]
-        
-        if 'concat' in transforms_to_apply:
-            separator = mapping.params.separator if mapping.params.separator is not None else ' '
+        has_concat, separator, transforms_to_apply = transforms_by_id[mapping.id]
+        
+        if has_concat:
             value = separator.join(source_values)
-            transforms_to_apply = [t for t in transforms_to_apply if t != 'concat']
         else:
             value = source_values[0] if source_values else ''
         
         for transform in transforms_to_apply:
-            if transform and transform != 'none':
-                old_value = value
-                value = apply_transform(value, transform, mapping.params.dict())
-                if old_value != value:
-                    print(f"  [TRANSFORM] {transform}: '{old_value}' -> '{value}'")
+            old_value = value
+            value = apply_transform(value, transform, params_by_id[mapping.id])
+            if debug and old_value != value:
+                logger.debug("  [TRANSFORM] %s: '%s' -> '%s'", transform, old_value, value)
         
         target_field = target_fields_by_id.get(mapping.target)
         if target_field:
-            if isinstance(target_field, dict):
-                field_type = target_field.get('type', 'string')
-                field_name = target_field.get('name', '')
-                field_path = target_field.get('path', '')
-            else:
-                field_type = target_field.type
-                field_name = target_field.name
-                field_path = target_field.path
+            field_type = target_field.type
+            field_name = target_field.name
+            field_path = target_field.path
             
             validated_value = validate_and_transform_value(value, field_type, field_name)
             result[field_path] = validated_value
-            if validated_value:
-                print(f"  -> TARGET: {field_name} = '{validated_value}'")
-            else:
-                print(f"  -> TARGET: {field_name} = <empty>")
+            if debug:
+                logger.debug("  -> TARGET: %s = '%s'", field_name, validated_value or '<empty>')
         else:
-            print(f"  [WARNING] Target field not found: {mapping.target}")
+            logger.warning("  [WARNING] Target field not found: %s", mapping.target)
     
     return result
 
 
+def _map_unique(series: pd.Series, func: Callable[[str], str]) -> pd.Series:
+    """Apply func once per distinct value of series (func must be deterministic)."""
+    return series.map({value: func(value) for value in series.unique()})
+
+
+def used_source_columns(columns: Sequence[str], compiled: CompiledMappingSet) -> List[int]:
+    """
+    Positions of the columns apply_mappings_to_dataframe reads, in column order.
+
+    Path matching on this subset resolves to the same columns as on all of them.
+    """
+    column_map = {column: column for column in columns}
+    used = set()
+    for mapping in compiled.active_mappings:
+        if mapping.target not in compiled.target_fields_by_id:
+            continue
+        for src_id in mapping.source:
+            if not src_id.startswith('const-') and src_id in compiled.row_lookups_by_id:
+                column = compiled.row_lookups_by_id[src_id](column_map)
+                if column is not None:
+                    used.add(column)
+    return [i for i, column in enumerate(columns) if column in used]
+
+
+def apply_mappings_to_dataframe(df: pd.DataFrame, compiled: CompiledMappingSet) -> pd.DataFrame:
+    """
+    Column-wise equivalent of apply_mappings_to_row for every row of df.
+
+    Source paths are matched against the column names once (row keys are the
+    same for every row), concat is done on whole columns and transforms plus
+    validation run once per distinct value. Returns one column per target
+    path, all string values.
+    """
+    source_fields_by_id = compiled.source_fields_by_id
+    target_fields_by_id = compiled.target_fields_by_id
+    constant_values_by_id = compiled.constant_values_by_id
+    params_by_id = compiled.params_by_id
+    transforms_by_id = compiled.transforms_by_id
+    row_lookups_by_id = compiled.row_lookups_by_id
+
+    # Column name -> itself, so a row lookup returns the column it matched
+    columns = {column: column for column in df.columns}
+    empty = pd.Series('', index=df.index, dtype=object)
+
+    # Target path -> column; a later mapping to the same path overwrites, like in a row dict
+    out = {}
+
+    logger.debug("[MAPPING] Processing %s rows with %s columns", len(df), len(df.columns))
+    logger.debug("[MAPPING] Applying %s mappings", len(compiled.active_mappings))
+
+    for mapping in compiled.active_mappings:
+        target_field = target_fields_by_id.get(mapping.target)
+        if not target_field:
+            logger.warning("  [WARNING] Target field not found: %s", mapping.target)
+            continue
+
+        source_values = []
+        for src_id in mapping.source:
+            if src_id.startswith('const-'):
+                source_values.append(pd.Series(constant_values_by_id.get(src_id, ''), index=df.index, dtype=object))
+            elif src_id not in source_fields_by_id:
+                logger.warning("  [WARNING] Source field ID not found: %s", src_id)
+                source_values.append(empty)
+            else:
+                column = row_lookups_by_id[src_id](columns)
+                if column is None:
+                    source_field = source_fields_by_id[src_id]
+                    logger.debug("  [MISSING] %s (path: %s) NOT FOUND in source data", source_field.name, source_field.path)
+                    source_values.append(empty)
+                else:
+                    source_values.append(df[column].astype(object).map(_to_str))
+
+        has_concat, separator, transforms_to_apply = transforms_by_id[mapping.id]
+        if not source_values:
+            value = empty
+        elif has_concat:
+            value = source_values[0]
+            for other in source_values[1:]:
+                value = value + separator + other
+        else:
+            value = source_values[0]
+
+        transformer = _build_transformer(transforms_to_apply, params_by_id[mapping.id], target_field.type, target_field.name)
+        out[target_field.path] = _map_unique(value, transformer)
+
+    return pd.DataFrame(out, index=df.index)
+
+
 # ============================================================================
 # XML CREATION WITH CORRECT ELEMENT ORDERING
 # ============================================================================
 
+def _schema_path_parts(schema: Schema) -> Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Split every field path once per schema instead of once per record.
+
+    Returns field path -> (parts, prefixes), where prefixes holds the cumulative
+    partial paths ('a', 'a/b', 'a/b/c') used as element keys.
+    """
+    if schema._path_parts is None:
+        path_parts = {}
+        for field in schema.fields:
+            parts = tuple(field.path.split('/'))
+            prefixes = tuple('/'.join(parts[:i + 1]) for i in range(len(parts)))
+            path_parts[field.path] = (parts, prefixes)
+        schema._path_parts = path_parts
+    return schema._path_parts
+
+
+def _schema_xml_plan(schema: Schema) -> Tuple[List[SchemaField], Set[str]]:
+    """
+    Build the per-schema plan for create_xml_from_data once instead of per record.
+
+    Returns (sorted_fields, repeating_wrapper_paths): the fields to emit in XSD
+    order, with fields inside repeating wrappers already filtered out, and the
+    wrapper paths that must not be created as plain elements.
+    """
+    if schema._xml_plan is None:
+        # Get repeating wrapper paths to skip
+        repeating_wrapper_paths = set()
+        if hasattr(schema, 'repeating_elements') and schema.repeating_elements:
+            for rep_elem in schema.repeating_elements:
+                wrapper_path = rep_elem.get('wrapper_path') or rep_elem.get('path')
+                if wrapper_path:
+                    repeating_wrapper_paths.add(wrapper_path)
+
+        # Sort fields by their XSD order, dropping those owned by repeating wrappers
+        sorted_fields = [
+            field for field in sorted(schema.fields, key=lambda f: getattr(f, 'order', 999999))
+            if not any(field.path.startswith(wrapper_path + '/') or field.path == wrapper_path
+                       for wrapper_path in repeating_wrapper_paths)
+        ]
+        schema._xml_plan = (sorted_fields, repeating_wrapper_paths)
+    return schema._xml_plan
+
+
+def compile_xml_builder(
+    schema: Schema,
+    root_element_name: str = "Record",
+    namespace: str = None,
+    columns: Optional[Sequence[str]] = None
+) -> Callable[[Any], ET.Element]:
+    """
+    Specialize create_xml_from_data for one schema.
+
+    The schema walk (XSD ordering, repeating wrapper filtering, path splitting)
+    is done here once; the returned function only builds the tree for a record.
+    The record is a dict keyed by target path, or, when columns is given, a row
+    tuple in that column order (fields outside columns are never emitted).
+    """
+    sorted_fields, repeating_wrapper_paths = _schema_xml_plan(schema)
+    path_parts_by_path = _schema_path_parts(schema)
+    logger.debug("[XML CREATE] Skipping %s repeating wrapper paths", len(repeating_wrapper_paths))
+
+    column_index = {column: i for i, column in enumerate(columns)} if columns is not None else None
+
+    # (record key, path, parts, prefixes, is_repeatable) per field, in schema order
+    steps = [
+        (
+            field.path if column_index is None else column_index[field.path],
+            field.path,
+            *path_parts_by_path[field.path],
+            getattr(field, 'repeatable', False) or getattr(field, 'maxOccurs', '1') == 'unbounded'
+        )
+        for field in sorted_fields
+        if column_index is None or field.path in column_index
+    ]
+    nsmap = {None: namespace} if namespace else None
+
+    def build(data: Any) -> ET.Element:
+        fetch = data.get if column_index is None else data.__getitem__
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[XML CREATE] Creating XML with %s mapped fields", len(data))
+            if namespace:
+                logger.debug("[XML CREATE] Using default namespace: %s", namespace)
+
+        root = None
+        # Elements along the previous field's path; sorted fields share long prefixes,
+        # so most fields only pop/push a level or two instead of re-walking the path
+        parent_stack = []
+        prev_parts = ()
+        # Created elements by partial path, only consulted when a path re-enters a
+        # branch left earlier (fields are ordered by XSD order, not by path)
+        elements = {}
+
+        # Process fields in schema order
+        for key, field_path, path_parts, path_prefixes, is_repeatable in steps:
+            value = fetch(key)
+
+            # Skip fields without values (don't create empty elements)
+            if not value:
+                continue
+
+            # Pop back to the prefix shared with the previous field
+            common = 0
+            max_common = min(len(prev_parts), len(path_parts))
+            while common < max_common and prev_parts[common] == path_parts[common]:
+                common += 1
+            del parent_stack[common:]
+
+            # Push (find or create) the remaining levels
+            for i in range(common, len(path_parts)):
+                elem = elements.get(path_prefixes[i])
+                if elem is None:
+                    if i == 0:
+                        elem = ET.Element(path_parts[i], nsmap=nsmap)
+                        root = elem
+                    else:
+                        elem = ET.SubElement(parent_stack[-1], path_parts[i])
+                    elements[path_prefixes[i]] = elem
+                parent_stack.append(elem)
+            prev_parts = path_parts
+
+            if not is_repeatable:
+                # Values are non-empty here, so empty date handling never applies
+                parent_stack[-1].text = str(value)
+                if debug:
+                    logger.debug("  %s = '%s'", field_path, value)
+            else:
+                # Remove placeholder for repeatable fields
+                parent = parent_stack[-2] if len(parent_stack) > 1 else None
+                placeholder = parent_stack.pop()
+                prev_parts = path_parts[:-1]
+                if parent is not None:
+                    try:
+                        parent.remove(placeholder)
+                    except ValueError:
+                        pass
+                del elements[field_path]
+
+        if root is None:
+            root = ET.Element(root_element_name, nsmap=nsmap)
+
+        return root
+
+    return build
+
+
+# Placeholder text marking which column fills an element in a record template
+_TEMPLATE_MARK = '\ue000'
+
+
+def compile_xml_template_builder(
+    schema: Schema,
+    root_element_name: str,
+    namespace: Optional[str],
+    columns: Sequence[str],
+    max_templates: int = 1024
+) -> Callable[[Tuple[Any, ...]], ET.Element]:
+    """
+    Row-tuple builder that deep-copies a prebuilt tree instead of building one per record.
+
+    Which elements a record creates depends only on which of its columns are
+    non-empty, so the tree for each such shape is built once, with placeholder
+    texts to locate the leaves. Later rows of that shape copy the tree (in C)
+    and only set the leaf texts. Beyond max_templates shapes, rows are built
+    directly.
+    """
+    build_row = compile_xml_builder(schema, root_element_name, namespace, columns=columns)
+    # Row shape -> (template root, [(position in root.iter(), column index)])
+    templates = {}
+
+    def make_template(shape: Tuple[bool, ...]):
+        root = build_row(tuple(f"{_TEMPLATE_MARK}{i}" if filled else '' for i, filled in enumerate(shape)))
+        slots = []
+        for position, elem in enumerate(root.iter()):
+            if elem.text and elem.text[0] == _TEMPLATE_MARK:
+                slots.append((position, int(elem.text[1:])))
+                elem.text = None
+        return root, slots
+
+    def build(row: Tuple[Any, ...]) -> ET.Element:
+        shape = tuple(map(bool, row))
+        template = templates.get(shape)
+        if template is None:
+            if len(templates) >= max_templates:
+                return build_row(row)
+            template = templates[shape] = make_template(shape)
+
+        template_root, slots = template
+        root = copy.deepcopy(template_root)
+        if slots:
+            elems = list(root.iter())
+            for position, column in slots:
+                elems[position].text = _to_str(row[column])
+        return root
+
+    return build
+
+
 def create_xml_from_data(
     data: Dict[str, str], 
     schema: Schema, 
@@ -1502,106 +1999,62 @@ def create_xml_from_data(
 ) -> ET.Element:
     """
     Create XML with default namespace and correct element ordering.
+
+    One-off convenience wrapper; code building many records should compile the
+    builder once with compile_xml_builder.
     """
-    print(f"\n[XML CREATE] Creating XML with {len(data)} mapped fields")
-    if namespace:
-        print(f"[XML CREATE] Using default namespace: {namespace}")
-    
-    root = None
-    elements = {}
-    
-    nsmap = {None: namespace} if namespace else None
-    
-    # Get repeating wrapper paths to skip
-    repeating_wrapper_paths = set()
-    if hasattr(schema, 'repeating_elements') and schema.repeating_elements:
-        for rep_elem in schema.repeating_elements:
-            wrapper_path = rep_elem.get('wrapper_path') or rep_elem.get('path')
-            if wrapper_path:
-                repeating_wrapper_paths.add(wrapper_path)
-    
-    print(f"[XML CREATE] Skipping {len(repeating_wrapper_paths)} repeating wrapper paths")
+    return compile_xml_builder(schema, root_element_name, namespace)(data)
 
-    # Sort fields by their XSD order before processing
-    sorted_fields = sorted(schema.fields, key=lambda f: getattr(f, 'order', 999999))
 
-    # Process fields in schema order
-    for field in sorted_fields:
-        path_parts = field.path.split('/')
-        value = data.get(field.path, '')
-        
-        is_repeatable = getattr(field, 'repeatable', False) or getattr(field, 'maxOccurs', '1') == 'unbounded'
-        is_in_repeating_wrapper = any(field.path.startswith(wrapper_path + '/') or field.path == wrapper_path
-                                       for wrapper_path in repeating_wrapper_paths)
+def xml_element_to_dict(root: ET._Element) -> Dict[str, str]:
+    """
+    Flatten a parsed XML document to a dictionary with MULTIPLE path variations.
 
-        if is_in_repeating_wrapper:
-            continue
+    Each leaf's stripped text is stored under its full path and its partial
+    paths; callers that also need the tree parse the document only once.
+    """
+    result = {}
+    element_paths = {}
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    for elem in root.iter(tag=ET.Element):
+        tag = _local_name(elem.tag)
+        if elem is root:
+            current_path = tag
+        else:
+            current_path = f"{element_paths[elem.getparent()]}/{tag}"
 
-        # Skip fields without values (don't create empty elements)
-        if not value:
+        # Only leaf text is stored; leaves come in document order, as with 'end' events
+        if next(elem.iterchildren(tag=ET.Element), None) is not None:
+            element_paths[elem] = current_path
             continue
-        
-        for i in range(len(path_parts)):
-            partial_path = '/'.join(path_parts[:i+1])
-            
-            if partial_path in repeating_wrapper_paths:
-                continue
-            
-            if partial_path not in elements:
-                elem_name = path_parts[i]
-                
-                if i == 0:
-                    elem = ET.Element(elem_name, nsmap=nsmap)
-                    root = elem
-                else:
-                    parent_path = '/'.join(path_parts[:i])
-                    if parent_path in elements:
-                        elem = ET.SubElement(elements[parent_path], elem_name)
-                    else:
-                        continue
-                
-                elements[partial_path] = elem
-        
-        if not is_repeatable and field.path in elements:
-            leaf_elem = elements[field.path]
-            field_type = getattr(field, 'type', 'string')
-
-            # For date/dateTime types, don't set empty string (it's invalid)
-            # Instead, remove the element if optional and empty
-            if value:
-                leaf_elem.text = str(value)
-                print(f"  {field.path} = '{value}'")
-            elif field_type in ['date', 'xs:date', 'dateTime', 'xs:dateTime']:
-                # Empty date is invalid - remove element if it was created
-                try:
-                    parent_path = '/'.join(path_parts[:-1])
-                    parent = elements.get(parent_path)
-                    if parent is not None:
-                        try:
-                            parent.remove(leaf_elem)
-                            del elements[field.path]
-                            print(f"  {field.path} = <skipped - empty date>")
-                        except ValueError:
-                            # Element not found in parent, just skip
-                            print(f"  {field.path} = <empty date, could not remove>")
-                except Exception as e:
-                    print(f"  {field.path} = <error removing empty date: {e}>")
-            else:
-                # For non-date types, empty string is acceptable
-                leaf_elem.text = ""
-        elif is_repeatable and field.path in elements:
-            # Remove placeholder for repeatable fields
-            parent_path = '/'.join(path_parts[:-1])
-            parent = elements.get(parent_path)
-            placeholder = elements[field.path]
-            if parent is not None and placeholder in parent:
-                parent.remove(placeholder)
-            del elements[field.path]
-    
-    if root is None:
-        root = ET.Element(root_element_name, nsmap=nsmap)
-    
-    return root
+
+        text = elem.text
+        if text and text.strip():
+            text = text.strip()
+
+            # Store with FULL path (always); interned to match interned schema paths
+            result[sys.intern(current_path)] = text
+
+            # Store with partial paths (always overwrite to get most recent)
+            # This allows flexible matching while avoiding ambiguity from first-match
+            # BUT skip single-part paths (bare tag names) to avoid ambiguity
+            parts = current_path.split('/')
+            for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
+                partial = '/'.join(parts[i:])
+                result[sys.intern(partial)] = text
+
+            # DO NOT store bare tag name to avoid ambiguity with duplicate tag names
+            # PathMatcher will use full paths and partial paths for matching
+
+            if debug:
+                logger.debug("  [PARSE] %s = '%s'", current_path, text)
+
+    if debug:
+        logger.debug("[PARSE] Extracted %s unique paths", len(result))
+        logger.debug("[PARSE] Sample keys: %s", list(result.keys())[:10])
+
+    return result
 
 
 def parse_xml_to_dict(xml_content: bytes) -> Dict[str, str]:
@@ -1610,51 +2063,9 @@ def parse_xml_to_dict(xml_content: bytes) -> Dict[str, str]:
     """
     try:
         validate_file_size(xml_content, MAX_XML_SIZE)
-        parser = create_safe_xml_parser()
-        root = ET.fromstring(xml_content, parser=parser)
-        result = {}
-        
-        def extract_with_path(elem, path=""):
-            tag = elem.tag
-            if '}' in tag:
-                tag = tag.split('}')[1]
-            
-            current_path = f"{path}/{tag}" if path else tag
-            
-            has_text = elem.text and elem.text.strip()
-            has_children = len(elem) > 0
-            
-            if has_text and not has_children:
-                # Store with FULL path (always)
-                result[current_path] = elem.text.strip()
-
-                # Store with partial paths (always overwrite to get most recent)
-                # This allows flexible matching while avoiding ambiguity from first-match
-                # BUT skip single-part paths (bare tag names) to avoid ambiguity
-                parts = current_path.split('/')
-                for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
-                    partial = '/'.join(parts[i:])
-                    result[partial] = elem.text.strip()
-
-                # DO NOT store bare tag name to avoid ambiguity with duplicate tag names
-                # PathMatcher will use full paths and partial paths for matching
-
-                print(f"  [PARSE] {current_path} = '{elem.text.strip()}'")
-            
-            for child in elem:
-                extract_with_path(child, current_path)
-        
-        extract_with_path(root, "")
-        
-        print(f"\n[PARSE] Extracted {len(result)} unique paths")
-        print(f"[PARSE] Sample keys: {list(result.keys())[:10]}")
-        
-        return result
-        
+        return xml_element_to_dict(ET.fromstring(xml_content, parser=create_safe_xml_parser()))
     except Exception as e:
-        import traceback
-        print(f"[XML PARSE ERROR] {e}")
-        print(traceback.format_exc())
+        logger.exception("[XML PARSE ERROR] %s", e)
         raise Exception(f"Failed to parse XML: {str(e)}")
 
 
@@ -1662,48 +2073,64 @@ def parse_xml_to_dict(xml_content: bytes) -> Dict[str, str]:
 # CONDITIONAL MAPPING - EVALUATE CONDITIONS ON ELEMENTS
 # ============================================================================
 
-def evaluate_condition(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
-    """
-    Evaluate a single condition against element data.
+def _op_exists(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    # Check if field exists and is not empty
+    return condition.field in element_data and element_data[condition.field] != ""
 
-    Args:
-        condition: The condition to evaluate
-        element_data: Dictionary with element attributes and values
-                     Keys can be: "@name", "@dataType", "value", "property", etc.
 
-    Returns:
-        True if condition matches, False otherwise
-    """
-    field_value = element_data.get(condition.field, "")
+def _op_equals(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    return element_data.get(condition.field, "") == condition.value
 
-    if condition.operator == "exists":
-        # Check if field exists and is not empty
-        return condition.field in element_data and element_data[condition.field] != ""
 
-    if condition.operator == "equals":
-        return field_value == condition.value
+def _op_contains(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    return condition.value in element_data.get(condition.field, "")
 
-    if condition.operator == "contains":
-        return condition.value in field_value
 
-    if condition.operator == "startswith":
-        return field_value.startswith(condition.value)
+def _op_startswith(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    return element_data.get(condition.field, "").startswith(condition.value)
 
-    if condition.operator == "regex":
-        try:
-            if len(condition.value) > MAX_REGEX_LENGTH:
-                print(f"[CONDITION] Regex too long: {len(condition.value)}")
-                return False
-            return bool(re.match(condition.value, field_value))
-        except Exception as e:
-            print(f"[CONDITION] Regex error: {e}")
+
+def _op_regex(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    try:
+        if len(condition.value) > MAX_REGEX_LENGTH:
+            logger.warning("[CONDITION] Regex too long: %s", len(condition.value))
             return False
+        pattern = condition.compiled
+        return bool(pattern.match(element_data.get(condition.field, ""))) if pattern else False
+    except Exception as e:
+        logger.warning("[CONDITION] Regex error: %s", e)
+        return False
 
-    # Unknown operator
-    print(f"[CONDITION] Unknown operator: {condition.operator}")
+
+def _op_unknown(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    logger.warning("[CONDITION] Unknown operator: %s", condition.operator)
     return False
 
 
+_OP_DISPATCH = {
+    "exists": _op_exists,
+    "equals": _op_equals,
+    "contains": _op_contains,
+    "startswith": _op_startswith,
+    "regex": _op_regex,
+}
+
+
+def evaluate_condition(condition: MappingCondition, element_data: Dict[str, str]) -> bool:
+    """
+    Evaluate a single condition against element data.
+
+    Args:
+        condition: The condition to evaluate
+        element_data: Dictionary with element attributes and values
+                     Keys can be: "@name", "@dataType", "value", "property", etc.
+
+    Returns:
+        True if condition matches, False otherwise
+    """
+    return _OP_DISPATCH.get(condition.operator, _op_unknown)(condition, element_data)
+
+
 def evaluate_conditions(conditions: List[MappingCondition], element_data: Dict[str, str]) -> bool:
     """
     Evaluate all conditions (AND logic).
@@ -1729,6 +2156,267 @@ def evaluate_conditions(conditions: List[MappingCondition], element_data: Dict[s
 # REPEATING MAPPINGS - ALL MODES PRESERVED + CORRECT ORDERING
 # ============================================================================
 
+_XML_NAME_RE = re.compile(r'[A-Za-z_][\w.\-]*')
+
+
+@lru_cache(maxsize=512)
+def _compiled_ns_mapped(path: str, ns_uri: Optional[str]) -> Optional[ET.XPath]:
+    """
+    Compiled descendant XPath using real element names in a single namespace.
+
+    Unlike local-name() predicates this lets libxml2 match elements by name.
+    Returns None if a path part is not a plain XML name.
+    """
+    path_parts = path.split('/')
+    if not all(_XML_NAME_RE.fullmatch(part) for part in path_parts):
+        return None
+    if ns_uri:
+        return ET.XPath('//' + '//'.join([f"ns:{part}" for part in path_parts]), namespaces={'ns': ns_uri})
+    return ET.XPath('//' + '//'.join(path_parts))
+
+
+# True if any element is outside namespace $ns ('' for no namespace)
+_HAS_FOREIGN_NS_XPATH = ET.XPath("boolean(//*[namespace-uri() != $ns])")
+
+
+def _uniform_default_namespace(root: ET._Element) -> Tuple[bool, Optional[str]]:
+    """
+    (True, uri) when every element of the document is in root's default namespace
+    (uri None: no namespace), else (False, None). Prefixed declarations such as
+    xmlns:xsi don't matter, only the namespaces elements actually use.
+    """
+    ns_uri = root.nsmap.get(None)
+    if _HAS_FOREIGN_NS_XPATH(root, ns=ns_uri or ''):
+        return False, None
+    return True, ns_uri
+
+
+@lru_cache(maxsize=512)
+def _compiled_ns_agnostic(path: str) -> ET.XPath:
+    """Compiled namespace-agnostic descendant XPath for a slash-separated element path."""
+    path_parts = path.split('/')
+    return ET.XPath('//' + '//'.join([f"*[local-name()='{part}']" for part in path_parts]))
+
+
+@lru_cache(maxsize=512)
+def _compiled_local_name_search(local_name: str) -> ET.XPath:
+    """Compiled XPath finding all descendants with the given local name."""
+    return ET.XPath(f".//*[local-name()='{local_name}']")
+
+
+class InstanceData(dict):
+    """
+    Full path -> value entries of one repeating instance, in first-write order.
+
+    write_log stays None while every path was written once. When a path
+    (a repeated sibling) is written again, it becomes the list of paths in
+    write order, so suffix lookups can find the most recently written match.
+    """
+    __slots__ = ('write_log',)
+
+    def __init__(self):
+        super().__init__()
+        self.write_log: Optional[List[str]] = None
+
+    def write(self, path: str, value: str):
+        if self.write_log is not None:
+            self.write_log.append(path)
+        elif path in self:
+            self.write_log = list(self)
+            self.write_log.append(path)
+        self[path] = value
+
+
+def _extract_instance_data(loop_elem: ET._Element) -> InstanceData:
+    """
+    Flatten one repeating source instance into path -> value entries.
+
+    Paths are relative to the loop element (which is the first path part);
+    text values and attributes ("path/@attr") are stored under their full
+    path only. Look values up with path_matcher.find_value(..., suffix_match=True)
+    to match partial paths.
+    """
+    instance_data = InstanceData()
+    write = instance_data.write
+    # Keyed by element, not id(): lxml proxies (and their ids) are only
+    # stable while referenced
+    element_paths = {}
+    local_name = _local_name
+
+    for elem in loop_elem.iter(tag=ET.Element):
+        tag = local_name(elem.tag)
+        if elem is loop_elem:
+            current_path = tag
+        else:
+            current_path = f"{element_paths[elem.getparent()]}/{tag}"
+        element_paths[elem] = current_path
+
+        text = elem.text
+        if text:
+            text = text.strip()
+            if text:
+                write(current_path, text)
+
+        for attr, val in elem.items():
+            write(f"{current_path}/@{attr}", val)
+
+    return instance_data
+
+
+@lru_cache(maxsize=512)
+def _compiled_instance_path(field_path: str) -> Optional[Tuple[str, ET.XPath, bool]]:
+    """
+    Compile a source field path for direct lookup below a loop element.
+
+    Returns (loop element local name, XPath relative to the loop element,
+    whether it selects an attribute), or None if the path is not made of
+    plain XML names.
+    """
+    path_parts = field_path.split('/')
+    attr = path_parts.pop()[1:] if path_parts[-1].startswith('@') else None
+    if not path_parts or not all(_XML_NAME_RE.fullmatch(part) for part in path_parts):
+        return None
+    if attr is not None and not _XML_NAME_RE.fullmatch(attr):
+        return None
+
+    steps = [f"*[local-name()='{part}']" for part in path_parts[1:]]
+    if attr is not None:
+        steps.append(f"@{attr}")
+    return path_parts[0], ET.XPath('/'.join(steps) if steps else '.'), attr is not None
+
+
+def _find_instance_value(loop_elem: ET._Element, field_path: str) -> Optional[str]:
+    """
+    Look up the exact full-path value _extract_instance_data would store for
+    field_path, without flattening the instance.
+
+    Returns None when there is no exact match, so callers can fall back to
+    path_matcher.find_value for partial/name matching.
+    """
+    compiled = _compiled_instance_path(field_path)
+    if compiled is None:
+        return None
+    loop_tag, xpath, is_attr = compiled
+    if _local_name(loop_elem.tag) != loop_tag:
+        return None
+
+    results = xpath(loop_elem)
+    if is_attr:
+        return str(results[-1]) if results else None
+
+    # Later elements overwrite earlier ones in the flattened instance
+    for elem in reversed(results):
+        text = elem.text
+        if text and text.strip():
+            return text.strip()
+    return None
+
+
+def _find_child(
+    parent: ET._Element,
+    local_name: str,
+    child_index: Dict[ET._Element, Dict[str, ET._Element]]
+) -> Optional[ET._Element]:
+    """
+    Return the first child of parent with the given local name, or None.
+
+    child_index caches parent -> {local name: first child}. A miss rescans the
+    parent once, so children added elsewhere are still found; callers register
+    children they create themselves. Keyed by element rather than id() since
+    lxml proxies are only stable while referenced.
+    """
+    children = child_index.get(parent)
+    if children is None or local_name not in children:
+        children = {}
+        for c in parent.iterchildren(tag=ET.Element):
+            children.setdefault(_local_name(c.tag), c)
+        child_index[parent] = children
+    return children.get(local_name)
+
+
+@lru_cache(maxsize=1024)
+def _target_plan(path: str, root_tag: str) -> Tuple[Tuple[Tuple[str, str], ...], str, str]:
+    """
+    Precompute how to materialize a slash-separated target path under a root.
+
+    Returns (steps, leaf_tag, leaf_parent_path): steps are the
+    (part, parent_path) pairs to navigate/create below the root, skipping
+    the root element itself if the path starts with it.
+    """
+    path_parts = path.split('/')
+    start_idx = 1 if path_parts[0] == root_tag else 0
+
+    steps = []
+    current_path = root_tag
+    for part in path_parts[start_idx:-1]:
+        steps.append((part, current_path))
+        current_path = f"{current_path}/{part}"
+
+    return tuple(steps), path_parts[-1], '/'.join(path_parts[:-1])
+
+
+@lru_cache(maxsize=1024)
+def _chain_template(tags: Tuple[str, ...]) -> Optional[str]:
+    """XML for a chain of nested empty elements, or None if a tag is not a plain XML name."""
+    if not all(_XML_NAME_RE.fullmatch(tag) for tag in tags):
+        return None
+    return (
+        ''.join(f"<{tag}>" for tag in tags[:-1])
+        + f"<{tags[-1]}/>"
+        + ''.join(f"</{tag}>" for tag in reversed(tags[:-1]))
+    )
+
+
+def _materialize(
+    root: ET._Element,
+    plan: Tuple[Tuple[Tuple[str, str], ...], str, str],
+    text: Optional[str],
+    order_tracker: ElementOrderTracker,
+    child_index: Dict[ET._Element, Dict[str, ET._Element]]
+) -> Tuple[ET._Element, int]:
+    """
+    Navigate/create the parents of a _target_plan and insert a new leaf element.
+
+    Missing parents and the leaf are inserted at their schema-ordered
+    position. Returns the new leaf and its insertion index.
+    """
+    steps, leaf_tag, parent_path = plan
+
+    current = root
+    for i, (part, current_path) in enumerate(steps):
+        child = _find_child(current, part, child_index)
+        if child is None:
+            template = _chain_template(tuple(p for p, _ in steps[i:]) + (leaf_tag,))
+            if template is not None:
+                # Build the missing parents and the leaf in one libxml2 parse;
+                # inside fresh parents every insertion index is 0
+                insert_idx = order_tracker.get_insertion_index(current, part, current_path)
+                child = ET.fromstring(template)
+                current.insert(insert_idx, child)
+                child_index[current][part] = child
+                leaf = child
+                while len(leaf):
+                    leaf = leaf[0]
+                if text is not None:
+                    leaf.text = text
+                return leaf, 0
+
+            # Create at correct position
+            insert_idx = order_tracker.get_insertion_index(current, part, current_path)
+            child = ET.Element(part)
+            current.insert(insert_idx, child)
+            child_index[current][part] = child
+        current = child
+
+    insert_idx = order_tracker.get_insertion_index(current, leaf_tag, parent_path)
+    leaf = ET.Element(leaf_tag)
+    if text is not None:
+        leaf.text = text
+    current.insert(insert_idx, leaf)
+
+    return leaf, insert_idx
+
+
 def apply_repeating_mappings_to_xml(
     source_root: ET._Element, 
     target_root: ET._Element,
@@ -1736,7 +2424,8 @@ def apply_repeating_mappings_to_xml(
     source_schema: Schema,
     target_schema: Schema,
     constants: List[Constant] = None,
-    target_namespace: str = None
+    target_namespace: str = None,
+    compiled: CompiledMappingSet = None
 ) -> int:
     """
     Apply repeating element mappings with ALL modes preserved:
@@ -1744,12 +2433,37 @@ def apply_repeating_mappings_to_xml(
     2. REPEAT-TO-SINGLE mode: repeating source -> repeatable target field (no wrapper)
     
     FIXED: Elements are now inserted at correct position based on schema order.
+
+    Pass a prebuilt CompiledMappingSet to reuse its field/constant lookups
+    across files; otherwise they are built once per call.
     """
     total_instances = 0
     
     # Create element order tracker for correct positioning
     order_tracker = ElementOrderTracker(target_schema)
 
+    # parent -> {local name: first child}, shared by all navigation loops
+    child_index = {}
+    root_tag = _local_name(target_root.tag)
+
+    # Loop elements can be queried by real names only if all elements share one namespace
+    uniform_ns, source_ns_uri = _uniform_default_namespace(source_root)
+
+    # Build field lookups once, not per container
+    if compiled is None:
+        compiled = CompiledMappingSet(mappings, source_schema, target_schema, constants)
+    source_fields_by_id = compiled.source_fields_by_id
+    target_fields_by_id = compiled.target_fields_by_id
+    constant_values_by_id = compiled.constant_values_by_id
+    params_by_id = compiled.params_by_id
+    transforms_by_id = compiled.transforms_by_id
+
+    # Group child mappings by their container in a single pass
+    children_by_container = defaultdict(list)
+    for m in mappings:
+        if m.parent_repeat_container:
+            children_by_container[m.parent_repeat_container].append(m)
+
     # Process ALL container mappings (repeat, merge, first, last)
     container_mappings = [m for m in mappings if m.is_container]
     
@@ -1757,64 +2471,57 @@ def apply_repeating_mappings_to_xml(
         if not container.loop_element_path:
             continue
         
-        child_mappings = [m for m in mappings if m.parent_repeat_container == container.id]
+        child_mappings = children_by_container.get(container.id, [])
         
         if not child_mappings:
-            print(f"[REPEAT] No child mappings for container {container.id}")
+            logger.debug("[REPEAT] No child mappings for container %s", container.id)
             continue
         
         safe_loop_path = sanitize_xpath(container.loop_element_path)
         search_path = safe_loop_path.lstrip('/')
         
-        # Namespace-agnostic XPath
         path_parts = search_path.split('/')
-        ns_agnostic_xpath = '//' + '//'.join([f"*[local-name()='{part}']" for part in path_parts])
         
-        print(f"[REPEAT] Original path: {safe_loop_path}")
-        print(f"[REPEAT] Path parts: {path_parts}")
-        print(f"[REPEAT] Namespace-agnostic XPath: {ns_agnostic_xpath}")
+        logger.debug("[REPEAT] Original path: %s", safe_loop_path)
+        logger.debug("[REPEAT] Path parts: %s", path_parts)
         
         try:
-            loop_elements = source_root.xpath(ns_agnostic_xpath)
-            print(f"[REPEAT] XPath returned {len(loop_elements)} elements")
+            loop_elements = []
+
+            # Every element in the default (or no) namespace: query by real names
+            if uniform_ns:
+                ns_mapped_xpath = _compiled_ns_mapped(search_path, source_ns_uri)
+                if ns_mapped_xpath is not None:
+                    logger.debug("[REPEAT] Namespace-mapped XPath: %s", ns_mapped_xpath.path)
+                    loop_elements = ns_mapped_xpath(source_root)
+                    logger.debug("[REPEAT] XPath returned %s elements", len(loop_elements))
+
+            if not loop_elements:
+                # Namespace-agnostic XPath (compiled once per path)
+                ns_agnostic_xpath = _compiled_ns_agnostic(search_path)
+                logger.debug("[REPEAT] Namespace-agnostic XPath: %s", ns_agnostic_xpath.path)
+
+                loop_elements = ns_agnostic_xpath(source_root)
+                logger.debug("[REPEAT] XPath returned %s elements", len(loop_elements))
             
             if not loop_elements:
-                print(f"[REPEAT] Trying simplified XPath...")
+                logger.debug("[REPEAT] Trying simplified XPath...")
                 last_part = path_parts[-1]
-                simple_xpath = f".//*[local-name()='{last_part}']"
-                loop_elements = source_root.xpath(simple_xpath)
-                print(f"[REPEAT] Simplified XPath found {len(loop_elements)} elements")
+                loop_elements = _compiled_local_name_search(last_part)(source_root)
+                logger.debug("[REPEAT] Simplified XPath found %s elements", len(loop_elements))
             
             if not loop_elements:
-                print(f"[REPEAT] No elements found at path: {safe_loop_path}")
+                logger.debug("[REPEAT] No elements found at path: %s", safe_loop_path)
                 continue
             
-            print(f"[REPEAT] Found {len(loop_elements)} instances of {container.loop_element_path}")
-            
-            # Build field lookups
-            source_fields_by_id = {f.id: f for f in source_schema.fields}
-            target_fields_by_id = {f.id: f for f in target_schema.fields}
-            
-            if source_schema.repeating_elements:
-                for rep_elem in source_schema.repeating_elements:
-                    if rep_elem.get('fields'):
-                        for field in rep_elem['fields']:
-                            source_fields_by_id[field['id']] = field
+            logger.debug("[REPEAT] Found %s instances of %s", len(loop_elements), container.loop_element_path)
             
-            if target_schema.repeating_elements:
-                for rep_elem in target_schema.repeating_elements:
-                    if rep_elem.get('fields'):
-                        for field in rep_elem['fields']:
-                            target_fields_by_id[field['id']] = field
-            
-            print(f"[REPEAT] Source fields lookup: {len(source_fields_by_id)} fields")
-            print(f"[REPEAT] Target fields lookup: {len(target_fields_by_id)} fields")
-            
-            constants_by_id = {c.id: c for c in (constants or [])}
+            logger.debug("[REPEAT] Source fields lookup: %s fields", len(source_fields_by_id))
+            logger.debug("[REPEAT] Target fields lookup: %s fields", len(target_fields_by_id))
 
             # Determine aggregation mode
             aggregation_mode = container.aggregation or 'repeat'
-            print(f"[REPEAT] Aggregation mode: {aggregation_mode}")
+            logger.debug("[REPEAT] Aggregation mode: %s", aggregation_mode)
 
             # Get merge separator if in merge mode
             merge_separator = getattr(container.params, 'mergeSeparator', ', ') if container.params and aggregation_mode == 'merge' else ', '
@@ -1823,60 +2530,62 @@ def apply_repeating_mappings_to_xml(
             elements_to_process = loop_elements
             if aggregation_mode == 'first':
                 elements_to_process = [loop_elements[0]] if loop_elements else []
-                print(f"[REPEAT] Using FIRST element only")
+                logger.debug("[REPEAT] Using FIRST element only")
             elif aggregation_mode == 'last':
                 elements_to_process = [loop_elements[-1]] if loop_elements else []
-                print(f"[REPEAT] Using LAST element only")
+                logger.debug("[REPEAT] Using LAST element only")
             elif aggregation_mode == 'merge':
                 # For merge, we'll collect all values from all elements and combine them
-                print(f"[REPEAT] Will MERGE all {len(loop_elements)} elements with separator: '{merge_separator}'")
+                logger.debug("[REPEAT] Will MERGE all %s elements with separator: '%s'", len(loop_elements), merge_separator)
 
             # Determine mode
             has_wrapper = container.target_wrapper_path is not None
             # In merge mode, always treat as repeat-to-single (no wrapper creation)
             is_repeat_to_single = aggregation_mode == 'merge' or container.repeat_to_single or not has_wrapper
 
-            print(f"[REPEAT] Mode: {'REPEAT-TO-SINGLE' if is_repeat_to_single else 'NORMAL (with wrapper)'}")
+            logger.debug("[REPEAT] Mode: %s", 'REPEAT-TO-SINGLE' if is_repeat_to_single else 'NORMAL (with wrapper)')
+
+            # Split wrapper and target field paths once, not per instance
+            target_parts = container.target_wrapper_path.strip('/').split('/') if has_wrapper and not is_repeat_to_single else []
+            wrapper_plan = _target_plan(container.target_wrapper_path.strip('/'), root_tag) if target_parts else None
+            mapping_target_parts = {
+                m.id: target_fields_by_id[m.target].path.split('/')
+                for m in child_mappings
+                if m.target in target_fields_by_id
+            }
+
+            # Specialize the path matcher once per source field
+            field_lookup = {}
+            for m in child_mappings:
+                for src_id in m.source:
+                    source_field = source_fields_by_id.get(src_id)
+                    if source_field and src_id not in field_lookup:
+                        field_lookup[src_id] = path_matcher.compile(source_field.path, source_field.name, suffix_match=True)
+
+            # Compose each mapping's transform chain once; outside merge mode
+            # it also validates for the target field
+            mapping_transformer = {}
+            for m in child_mappings:
+                m_transforms = transforms_by_id[m.id][2]
+                m_target = target_fields_by_id.get(m.target)
+                if aggregation_mode == 'merge' or m_target is None:
+                    mapping_transformer[m.id] = _build_transformer(m_transforms, params_by_id[m.id])
+                else:
+                    mapping_transformer[m.id] = _build_transformer(m_transforms, params_by_id[m.id], m_target.type, m_target.name)
 
             # Special handling for MERGE mode
             if aggregation_mode == 'merge':
                 # Collect all values from all instances for each child mapping
-                merged_values = {}  # mapping_id -> [values from all instances]
+                merged_values = defaultdict(list)  # mapping_id -> [values from all instances]
+                # (mapping_id, source values) -> transformed value; instances
+                # often repeat the same categorical values
+                transform_cache = {}
 
                 for idx, loop_elem in enumerate(loop_elements):
-                    print(f"\n[MERGE] Collecting values from instance {idx + 1}/{len(loop_elements)}")
-
-                    # Extract data from this source instance
-                    instance_data = {}
-
-                    def extract_from_element(elem, path=""):
-                        tag = elem.tag
-                        if '}' in tag:
-                            tag = tag.split('}')[1]
-
-                        current_path = f"{path}/{tag}" if path else tag
-
-                        if elem.text and elem.text.strip():
-                            instance_data[current_path] = elem.text.strip()
-                            # Also store with partial path variations for flexible matching
-                            # But DON'T store bare tag names to avoid ambiguity
-                            parts = current_path.split('/')
-                            for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
-                                partial = '/'.join(parts[i:])
-                                instance_data[partial] = elem.text.strip()
-
-                        for attr, val in elem.attrib.items():
-                            instance_data[f"{current_path}/@{attr}"] = val
-                            # Store attribute with partial paths but not bare tag
-                            parts = current_path.split('/')
-                            for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
-                                partial = '/'.join(parts[i:])
-                                instance_data[f"{partial}/@{attr}"] = val
-
-                        for child in elem:
-                            extract_from_element(child, current_path)
+                    logger.debug("[MERGE] Collecting values from instance %s/%s", idx + 1, len(loop_elements))
 
-                    extract_from_element(loop_elem, "")
+                    # Flattened lazily, only if a direct XPath lookup misses
+                    instance_data = None
 
                     # Collect values for each child mapping
                     for mapping in child_mappings:
@@ -1884,84 +2593,54 @@ def apply_repeating_mappings_to_xml(
 
                         for src_id in mapping.source:
                             if src_id.startswith('const-'):
-                                const = constants_by_id.get(src_id)
-                                value = const.value if const else ''
+                                value = constant_values_by_id.get(src_id, '')
                             else:
                                 source_field = source_fields_by_id.get(src_id)
                                 if not source_field:
                                     continue
 
-                                field_name = source_field.get('name', '') if isinstance(source_field, dict) else source_field.name
-                                field_path = source_field.get('path', '') if isinstance(source_field, dict) else source_field.path
-
-                                # Use improved path matcher
-                                value = path_matcher.find_value(instance_data, field_path, field_name)
+                                value = _find_instance_value(loop_elem, source_field.path)
+                                if value is None:
+                                    # Fall back to the improved path matcher
+                                    if instance_data is None:
+                                        instance_data = _extract_instance_data(loop_elem)
+                                    value = field_lookup[src_id](instance_data)
                                 if value is None:
                                     value = ''
 
-                            source_values.append(str(value))
+                            source_values.append(_to_str(value))
 
-                        # Apply transforms
-                        transforms_to_apply = mapping.transforms if mapping.transforms else ([mapping.transform] if mapping.transform else [])
+                        cache_key = (mapping.id, tuple(source_values))
+                        value = transform_cache.get(cache_key)
+                        if value is None:
+                            # Apply transforms
+                            has_concat, separator, _ = transforms_by_id[mapping.id]
 
-                        if 'concat' in transforms_to_apply:
-                            separator = mapping.params.separator if mapping.params.separator is not None else ' '
-                            value = separator.join(source_values)
-                            transforms_to_apply = [t for t in transforms_to_apply if t != 'concat']
-                        else:
-                            value = source_values[0] if source_values else ''
+                            if has_concat:
+                                value = separator.join(source_values)
+                            else:
+                                value = source_values[0] if source_values else ''
 
-                        for transform in transforms_to_apply:
-                            if transform and transform != 'none':
-                                value = apply_transform(value, transform, mapping.params.dict())
+                            value = mapping_transformer[mapping.id](value)
+                            transform_cache[cache_key] = value
 
                         # Store value for this instance
-                        if mapping.id not in merged_values:
-                            merged_values[mapping.id] = []
                         if value:  # Only add non-empty values
                             merged_values[mapping.id].append(value)
 
                 # Now create ONE target element with all merged values
-                print(f"\n[MERGE] Creating single target element with merged values")
+                logger.debug("[MERGE] Creating single target element with merged values")
 
                 wrapper_elem = None
-                target_parts = []
 
                 if has_wrapper and not is_repeat_to_single:
-                    target_parts = container.target_wrapper_path.strip('/').split('/')
-                    print(f"  [MERGE] Navigating wrapper path: {target_parts}")
-
-                    current = target_root
-                    root_tag = target_root.tag.split('}')[-1] if '}' in target_root.tag else target_root.tag
-
-                    start_idx = 1 if len(target_parts) > 0 and target_parts[0] == root_tag else 0
-
-                    for i in range(start_idx, len(target_parts) - 1):
-                        part = target_parts[i]
-                        child = None
-                        for c in current:
-                            c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
-                            if c_tag == part:
-                                child = c
-                                break
-
-                        if child is None:
-                            child = ET.Element(part)
-                            current.append(child)
-
-                        current = child
-
-                    # Create wrapper element at correct position
-                    final_tag = target_parts[-1]
-                    parent_path = '/'.join(target_parts[:-1]) if len(target_parts) > 1 else ""
-                    insert_idx = order_tracker.get_insertion_index(current, final_tag, parent_path)
-                    wrapper_elem = ET.Element(final_tag)
-                    current.insert(insert_idx, wrapper_elem)
+                    logger.debug("  [MERGE] Navigating wrapper path: %s", target_parts)
+                    wrapper_elem, insert_idx = _materialize(target_root, wrapper_plan, None, order_tracker, child_index)
                     total_instances += 1
-                    print(f"  [MERGE] Created wrapper: {final_tag} at index {insert_idx}")
+                    logger.debug("  [MERGE] Created wrapper: %s at index %s", wrapper_elem.tag, insert_idx)
                 else:
                     wrapper_elem = target_root
-                    print(f"  [MERGE] Using root as wrapper")
+                    logger.debug("  [MERGE] Using root as wrapper")
 
                 # Apply merged values to target fields
                 for mapping in child_mappings:
@@ -1971,56 +2650,23 @@ def apply_repeating_mappings_to_xml(
 
                     # Combine all values with the merge separator
                     combined_value = merge_separator.join(values)
-                    print(f"  [MERGE] Mapping {mapping.id}: {len(values)} values -> '{combined_value[:50]}...'")
+                    logger.debug("  [MERGE] Mapping %s: %s values -> '%s...'", mapping.id, len(values), combined_value[:50])
 
                     # Get target field
                     target_field = target_fields_by_id.get(mapping.target)
                     if target_field:
-                        field_type = target_field.get('type', 'string') if isinstance(target_field, dict) else target_field.type
-                        field_name = target_field.get('name', '') if isinstance(target_field, dict) else target_field.name
-                        field_path = target_field.get('path', '') if isinstance(target_field, dict) else target_field.path
+                        field_type = target_field.type
+                        field_name = target_field.name
+                        field_path = target_field.path
 
                         validated_value = validate_and_transform_value(combined_value, field_type, field_name)
 
                         if is_repeat_to_single:
                             # REPEAT-TO-SINGLE: Insert at correct position
-                            target_path_parts = field_path.split('/')
-
-                            current_elem = target_root
-                            current_path = target_root.tag.split('}')[-1] if '}' in target_root.tag else target_root.tag
-
-                            # Navigate/create path to parent
-                            root_tag = current_path
-                            start_idx = 1 if len(target_path_parts) > 0 and target_path_parts[0] == root_tag else 0
-
-                            for i in range(start_idx, len(target_path_parts) - 1):
-                                part = target_path_parts[i]
-
-                                # Find existing child
-                                child = None
-                                for c in current_elem:
-                                    c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
-                                    if c_tag == part:
-                                        child = c
-                                        break
-
-                                if child is None:
-                                    # Create at correct position
-                                    insert_idx = order_tracker.get_insertion_index(current_elem, part, current_path)
-                                    child = ET.Element(part)
-                                    current_elem.insert(insert_idx, child)
-
-                                current_path = f"{current_path}/{part}"
-                                current_elem = child
-
-                            # Create final element at correct position
-                            final_tag = target_path_parts[-1]
-                            parent_path = '/'.join(target_path_parts[:-1])
-                            insert_idx = order_tracker.get_insertion_index(current_elem, final_tag, parent_path)
-                            target_elem = ET.Element(final_tag)
-                            target_elem.text = validated_value
-                            current_elem.insert(insert_idx, target_elem)
-                            print(f"  [MERGE] Created {final_tag} = '{validated_value[:50]}...' at index {insert_idx}")
+                            target_elem, insert_idx = _materialize(
+                                target_root, _target_plan(field_path, root_tag), validated_value, order_tracker, child_index
+                            )
+                            logger.debug("  [MERGE] Created %s = '%s...' at index %s", target_elem.tag, validated_value[:50], insert_idx)
                         else:
                             # NORMAL mode: Add to wrapper
                             final_tag = field_name
@@ -2028,46 +2674,14 @@ def apply_repeating_mappings_to_xml(
                             target_elem = ET.Element(final_tag)
                             target_elem.text = validated_value
                             wrapper_elem.insert(insert_idx, target_elem)
-                            print(f"  [MERGE] Added {final_tag} = '{validated_value[:50]}...' at index {insert_idx}")
+                            logger.debug("  [MERGE] Added %s = '%s...' at index %s", final_tag, validated_value[:50], insert_idx)
 
                 # Skip the regular loop since we've handled merge mode
                 continue
 
             # Regular processing for repeat/first/last modes
             for idx, loop_elem in enumerate(elements_to_process):
-                print(f"\n[REPEAT] Processing instance {idx + 1}/{len(loop_elements)}")
-                
-                # Extract data from this source instance
-                instance_data = {}
-                
-                def extract_from_element(elem, path=""):
-                    tag = elem.tag
-                    if '}' in tag:
-                        tag = tag.split('}')[1]
-
-                    current_path = f"{path}/{tag}" if path else tag
-
-                    if elem.text and elem.text.strip():
-                        instance_data[current_path] = elem.text.strip()
-                        # Also store with partial path variations for flexible matching
-                        # But DON'T store bare tag names to avoid ambiguity
-                        parts = current_path.split('/')
-                        for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
-                            partial = '/'.join(parts[i:])
-                            instance_data[partial] = elem.text.strip()
-
-                    for attr, val in elem.attrib.items():
-                        instance_data[f"{current_path}/@{attr}"] = val
-                        # Store attribute with partial paths but not bare tag
-                        parts = current_path.split('/')
-                        for i in range(1, len(parts) - 1):  # Stop before creating bare tag name
-                            partial = '/'.join(parts[i:])
-                            instance_data[f"{partial}/@{attr}"] = val
-
-                    for child in elem:
-                        extract_from_element(child, current_path)
-                
-                extract_from_element(loop_elem, "")
+                logger.debug("[REPEAT] Processing instance %s/%s", idx + 1, len(loop_elements))
 
                 # ============================================================
                 # CHECK CONDITIONS - Skip if conditions don't match
@@ -2077,80 +2691,48 @@ def apply_repeating_mappings_to_xml(
                     element_data = {}
 
                     # Add attributes from the loop element itself
-                    for attr, val in loop_elem.attrib.items():
+                    for attr, val in loop_elem.items():
                         element_data[f"@{attr}"] = val
 
                     # Add child element values (like <value>Anna</value>)
-                    for child in loop_elem:
-                        child_tag = child.tag.split('}')[-1] if '}' in child.tag else child.tag
-                        if child.text and child.text.strip():
-                            element_data[child_tag] = child.text.strip()
+                    for child in loop_elem.iterchildren(tag=ET.Element):
+                        text = child.text
+                        if text and text.strip():
+                            element_data[_local_name(child.tag)] = text.strip()
 
                     # Check if conditions match
                     if not evaluate_conditions(container.conditions, element_data):
-                        print(f"  [CONDITION] Skipping instance {idx + 1} - conditions not met")
-                        print(f"  [CONDITION] Element data: {element_data}")
-                        print(f"  [CONDITION] Required conditions: {[(c.field, c.operator, c.value) for c in container.conditions]}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("  [CONDITION] Skipping instance %s - conditions not met", idx + 1)
+                            logger.debug("  [CONDITION] Element data: %s", element_data)
+                            logger.debug("  [CONDITION] Required conditions: %s", [(c.field, c.operator, c.value) for c in container.conditions])
                         continue
                     else:
-                        print(f"  [CONDITION] Instance {idx + 1} matches conditions")
-                        print(f"  [CONDITION] Element data: {element_data}")
+                        logger.debug("  [CONDITION] Instance %s matches conditions", idx + 1)
+                        logger.debug("  [CONDITION] Element data: %s", element_data)
+
+                # Extract data from this source instance (only once it passed the conditions)
+                instance_data = _extract_instance_data(loop_elem)
 
                 wrapper_elem = None
-                target_parts = []
                 
                 # ============================================================
                 # MODE: NORMAL (wrapper-to-wrapper)
                 # ============================================================
                 if has_wrapper and not is_repeat_to_single:
-                    target_parts = container.target_wrapper_path.strip('/').split('/')
-                    
-                    print(f"  [NORMAL] Navigating wrapper path: {target_parts}")
-                    
-                    current = target_root
-                    
-                    root_tag = target_root.tag.split('}')[-1] if '}' in target_root.tag else target_root.tag
-                    start_index = 1 if target_parts[0] == root_tag else 0
-                    
-                    print(f"  [NORMAL] Starting from index {start_index}")
-                    
-                    # Navigate to parent of wrapper
-                    current_path = root_tag
-                    for i in range(start_index, len(target_parts) - 1):
-                        part = target_parts[i]
-                        
-                        child = None
-                        for c in current:
-                            c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
-                            if c_tag == part:
-                                child = c
-                                break
-                        
-                        if child is None:
-                            # Create parent at correct position
-                            insert_idx = order_tracker.get_insertion_index(current, part, current_path)
-                            child = ET.Element(part)
-                            current.insert(insert_idx, child)
-                            print(f"  [NORMAL] Created parent: {part} at index {insert_idx}")
-                        
-                        current_path = f"{current_path}/{part}"
-                        current = child
+                    logger.debug("  [NORMAL] Navigating wrapper path: %s", target_parts)
                     
-                    # Create wrapper element at correct position
-                    final_tag = target_parts[-1]
-                    parent_path = '/'.join(target_parts[:-1]) if len(target_parts) > 1 else ""
-                    insert_idx = order_tracker.get_insertion_index(current, final_tag, parent_path)
-                    wrapper_elem = ET.Element(final_tag)
-                    current.insert(insert_idx, wrapper_elem)
+                    # Navigate to parent of wrapper, then create wrapper at correct position
+                    wrapper_elem, insert_idx = _materialize(target_root, wrapper_plan, None, order_tracker, child_index)
                     total_instances += 1
-                    print(f"  [NORMAL] Created wrapper: {final_tag} at index {insert_idx}")
+                    logger.debug("  [NORMAL] Created wrapper: %s at index %s", wrapper_elem.tag, insert_idx)
                 
                 # ============================================================
                 # MODE: REPEAT-TO-SINGLE (no wrapper)
                 # ============================================================
                 else:
                     wrapper_elem = target_root
-                    print(f"  [REPEAT-TO-SINGLE] Using root as wrapper")
+                    logger.debug("  [REPEAT-TO-SINGLE] Using root as wrapper")
                 
                 # Process child mappings
                 for mapping in child_mappings:
@@ -2158,116 +2740,69 @@ def apply_repeating_mappings_to_xml(
                     
                     for src_id in mapping.source:
                         if src_id.startswith('const-'):
-                            const = constants_by_id.get(src_id)
-                            value = const.value if const else ''
+                            value = constant_values_by_id.get(src_id, '')
                         else:
                             source_field = source_fields_by_id.get(src_id)
                             if not source_field:
-                                print(f"  [REPEAT WARNING] Source field not found: {src_id}")
+                                logger.warning("  [REPEAT WARNING] Source field not found: %s", src_id)
                                 continue
                             
-                            field_name = source_field.get('name', '') if isinstance(source_field, dict) else source_field.name
-                            field_path = source_field.get('path', '') if isinstance(source_field, dict) else source_field.path
-                            
                             # Use improved path matcher
-                            value = path_matcher.find_value(instance_data, field_path, field_name)
+                            value = field_lookup[src_id](instance_data)
                             if value is None:
                                 value = ''
                         
-                        source_values.append(str(value))
+                        source_values.append(_to_str(value))
                     
                     # Apply transforms
-                    transforms_to_apply = mapping.transforms if mapping.transforms else ([mapping.transform] if mapping.transform else [])
+                    has_concat, separator, _ = transforms_by_id[mapping.id]
                     
-                    if 'concat' in transforms_to_apply:
-                        separator = mapping.params.separator if mapping.params.separator is not None else ' '
+                    if has_concat:
                         value = separator.join(source_values)
-                        transforms_to_apply = [t for t in transforms_to_apply if t != 'concat']
                     else:
                         value = source_values[0] if source_values else ''
                     
-                    for transform in transforms_to_apply:
-                        if transform and transform != 'none':
-                            value = apply_transform(value, transform, mapping.params.dict())
-                    
                     # Get target field
                     target_field = target_fields_by_id.get(mapping.target)
                     if target_field:
-                        field_type = target_field.get('type', 'string') if isinstance(target_field, dict) else target_field.type
-                        field_name = target_field.get('name', '') if isinstance(target_field, dict) else target_field.name
-                        field_path = target_field.get('path', '') if isinstance(target_field, dict) else target_field.path
+                        field_name = target_field.name
+                        field_path = target_field.path
                         
-                        validated_value = validate_and_transform_value(value, field_type, field_name)
+                        # Transforms + validation, composed once per mapping
+                        validated_value = mapping_transformer[mapping.id](value)
                         
                         if is_repeat_to_single:
                             # ================================================
                             # REPEAT-TO-SINGLE: Insert at correct position
                             # ================================================
-                            target_path_parts = field_path.split('/')
-                            
-                            current_elem = target_root
-                            current_path = target_root.tag.split('}')[-1] if '}' in target_root.tag else target_root.tag
-                            
-                            # Navigate/create path to parent
-                            root_tag = current_path
-                            start_idx = 1 if len(target_path_parts) > 0 and target_path_parts[0] == root_tag else 0
-                            
-                            for i in range(start_idx, len(target_path_parts) - 1):
-                                part = target_path_parts[i]
-                                
-                                # Find existing child
-                                child = None
-                                for c in current_elem:
-                                    c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
-                                    if c_tag == part:
-                                        child = c
-                                        break
-                                
-                                if child is None:
-                                    # Create at correct position
-                                    insert_idx = order_tracker.get_insertion_index(current_elem, part, current_path)
-                                    child = ET.Element(part)
-                                    current_elem.insert(insert_idx, child)
-                                
-                                current_path = f"{current_path}/{part}"
-                                current_elem = child
-                            
-                            # Create final element at correct position
-                            final_tag = target_path_parts[-1]
-                            parent_path = '/'.join(target_path_parts[:-1])
-                            insert_idx = order_tracker.get_insertion_index(current_elem, final_tag, parent_path)
-                            final_elem = ET.Element(final_tag)
-                            final_elem.text = validated_value
-                            current_elem.insert(insert_idx, final_elem)
+                            final_elem, insert_idx = _materialize(
+                                target_root, _target_plan(field_path, root_tag), validated_value, order_tracker, child_index
+                            )
                             
-                            print(f"  [REPEAT-TO-SINGLE] Created {final_tag} = {validated_value} at index {insert_idx}")
+                            logger.debug("  [REPEAT-TO-SINGLE] Created %s = %s at index %s", final_elem.tag, validated_value, insert_idx)
                             
                             total_instances += 1
                         else:
                             # ================================================
                             # NORMAL: Create within wrapper
                             # ================================================
-                            target_path_parts = field_path.split('/')
+                            target_path_parts = mapping_target_parts[mapping.id]
                             wrapper_depth = len(target_parts)
                             relative_parts = target_path_parts[wrapper_depth:]
                             
                             current_elem = wrapper_elem
                             for part in relative_parts[:-1]:
-                                child = None
-                                for c in current_elem:
-                                    c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
-                                    if c_tag == part:
-                                        child = c
-                                        break
+                                child = _find_child(current_elem, part, child_index)
                                 
                                 if child is None:
                                     child = ET.SubElement(current_elem, part)
+                                    child_index[current_elem][part] = child
                                 current_elem = child
                             
                             final_tag = relative_parts[-1] if relative_parts else field_name
                             final_elem = None
                             for c in current_elem:
-                                c_tag = c.tag.split('}')[-1] if '}' in c.tag else c.tag
+                                c_tag = _local_name(c.tag)
                                 if c_tag == final_tag:
                                     final_elem = c
                                     break
@@ -2276,12 +2811,10 @@ def apply_repeating_mappings_to_xml(
                                 final_elem = ET.SubElement(current_elem, final_tag)
                             final_elem.text = validated_value
                             
-                            print(f"  [REPEAT] Set {final_tag} = {validated_value}")
+                            logger.debug("  [REPEAT] Set %s = %s", final_tag, validated_value)
             
         except Exception as e:
-            import traceback
-            print(f"[REPEAT ERROR] {e}")
-            print(traceback.format_exc())
+            logger.exception("[REPEAT ERROR] %s", e)
     
     return total_instances
 
@@ -2290,16 +2823,448 @@ def apply_repeating_mappings_to_xml(
 # BATCH PROCESSING
 # ============================================================================
 
-@app.post("/api/batch-process")
-async def batch_process(request: BatchProcessRequest):
-    """Process all files with all mapping modes supported"""
+XML_WRITE_BUFFER_SIZE = 1 << 20
+# Rows read (and mapped) at a time from a batch CSV file
+CSV_CHUNK_SIZE = 50_000
+# Per-file error messages returned in a batch response (the first ones; all are counted)
+MAX_BATCH_ERRORS = 100
+# Threads writing serialized CSV records, and how many writes may be in flight
+XML_WRITER_THREADS = 4
+XML_WRITE_QUEUE_SIZE = 256
+# Small batches run in-process: spawning workers (each importing this module) costs more
+# than it saves. The pool is used from this many files, or this much input in total
+BATCH_POOL_MIN_FILES = 8
+BATCH_POOL_MIN_BYTES = 16 * 1024 * 1024
+# Cap on batch worker processes; SCHMAPPER_BATCH_WORKERS overrides it (1 disables the pool)
+BATCH_MAX_WORKERS = int(os.environ.get('SCHMAPPER_BATCH_WORKERS', '0')) or min(os.cpu_count() or 1, 8)
+
+
+def write_xml_file(root: ET._Element, output_file: Union[str, Path]):
+    """Serialize a target document (pretty-printed, UTF-8, with declaration) through one buffered file handle."""
+    with open(output_file, 'wb', buffering=XML_WRITE_BUFFER_SIZE) as fh:
+        ET.ElementTree(root).write(fh, encoding='utf-8', xml_declaration=True, pretty_print=True)
+
+
+def serialize_xml(root: ET._Element) -> bytes:
+    """The exact bytes write_xml_file writes for root."""
+    return ET.tostring(root, encoding='UTF-8', xml_declaration=True, pretty_print=True)
+
+
+def _write_bytes(output_file: str, data: bytes):
+    with open(output_file, 'wb') as fh:
+        fh.write(data)
+
+
+def _guid_source(pool_size: int = 4096):
+    """Yield random (version 4) UUID strings, reading entropy from os.urandom in bulk."""
+    while True:
+        pool = os.urandom(16 * pool_size)
+        for i in range(0, len(pool), 16):
+            yield str(uuid.UUID(bytes=pool[i:i + 16], version=4))
+
+
+def _naming_projector(keys: Sequence[Any]) -> Callable[[Any], Tuple[Any, ...]]:
+    """Record -> tuple of the values at keys, as a single C-level itemgetter call."""
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda record: (record[key],)
+    return itemgetter(*keys)
+
+
+class BatchContext:
+    """
+    Per-batch state shared by the file workers.
+
+    Built from the (picklable) request, so every worker process can rebuild
+    its own copy once in _init_batch_worker instead of receiving compiled
+    lookups (which hold closures) per file.
+    """
+
+    def __init__(self, request: BatchProcessRequest, target_path: Path):
+        self.request = request
+        self.target_path = target_path
+        self.constants = request.constants or []
+        self.target_namespace = getattr(request.target_schema, 'namespace', None)
+        # One parser per worker; lxml parsers are reusable across parse calls
+        self.xml_parser = create_safe_xml_parser()
+        # Target schema walked once; builds the record tree per row/file
+        self.build_xml = compile_xml_builder(request.target_schema, "Record", self.target_namespace)
+
+        # Build direct mapping lookups once for the whole batch
+        direct_mappings = [m for m in request.mappings if not m.is_container]
+        self.compiled_mappings = CompiledMappingSet(
+            direct_mappings,
+            request.source_schema,
+            request.target_schema,
+            self.constants
+        )
+
+        # Resolve folder naming once per batch: field name -> target path
+        self.use_guid = request.folder_naming == "guid"
+        self.use_filename = request.folder_naming == "filename"
+        self.guids = _guid_source()
+        target_name_to_path = {f.name: f.path for f in request.target_schema.fields}
+        self.resolved_naming_paths = [
+            (field_name, target_name_to_path.get(field_name, field_name))
+            for field_name in (request.folder_naming_fields or [])
+        ]
+        self.use_fields = not (self.use_guid or self.use_filename) and bool(self.resolved_naming_paths)
+
+        self.naming_paths = [field_path for _, field_path in self.resolved_naming_paths]
+
+        # Output folders this worker has already created (GUID folders are never reused)
+        self.target_dir = str(target_path)
+        self.made_dirs: Set[str] = set()
+
+        # Staging for the current source file, see begin_file
+        self.stage_tag: Optional[str] = None
+        self.staged: Dict[str, str] = {}
+
+        # Namespace-agnostic XPath per folder naming field (XML sources)
+        self.naming_xpaths = {
+            field_path: '//' + '/'.join(f'*[local-name()="{part}"]' for part in field_path.split('/'))
+            for _, field_path in self.resolved_naming_paths
+        }
+
+        if self.resolved_naming_paths and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[FOLDER NAMING DEBUG] folder_naming_fields: %s", request.folder_naming_fields)
+            logger.debug("[FOLDER NAMING DEBUG] All available field names: %s", list(target_name_to_path.keys()))
+            logger.debug("[FOLDER NAMING DEBUG] Complete name->path map:")
+            for name, path in target_name_to_path.items():
+                logger.debug("  '%s' -> '%s'", name, path)
+
+    def begin_file(self, stage_tag: Optional[str] = None):
+        """
+        Start processing a source file.
+
+        Field-named outputs of different source files can share a path. When files
+        run in parallel, stage_tag (unique per source file) makes output_file hand out
+        part files instead, recorded in self.staged as output file -> part file, which
+        the parent moves into place in file order so the last file still wins.
+        GUID and filename folders cannot collide across files and are written directly.
+        """
+        self.stage_tag = stage_tag if self.use_fields else None
+        self.staged = {}
+
+    def output_file(self, folder_name: str) -> str:
+        """Path to write the record file inside folder_name to, creating the folder on first use."""
+        folder = os.path.join(self.target_dir, folder_name)
+        if folder not in self.made_dirs:
+            os.makedirs(folder, exist_ok=True)
+            if not self.use_guid:
+                self.made_dirs.add(folder)
+        output_file = os.path.join(folder, f"{folder_name}.xml")
+        if self.stage_tag is None:
+            return output_file
+        part_file = self.staged.get(output_file)
+        if part_file is None:
+            part_file = self.staged[output_file] = f"{output_file}.{self.stage_tag}.part"
+        return part_file
+
+
+def build_folder_name(ctx: BatchContext, naming_values: Sequence[Any], default_stem: str) -> str:
+    """
+    Resolve the output folder name for one record according to the batch's folder naming mode.
+
+    `naming_values` holds the record's value per resolved naming path; callers only need
+    to supply them when ctx.use_fields is set. Falls back to a GUID when no naming field
+    yields a usable value.
+    """
+    if ctx.use_guid:
+        return next(ctx.guids)
+    if ctx.use_filename:
+        return default_stem
+
+    debug = logger.isEnabledFor(logging.DEBUG)
+    name_parts = []
+    for (field_name, field_path), value in zip(ctx.resolved_naming_paths, naming_values):
+
+        if debug:
+            logger.debug("[FOLDER NAMING DEBUG] Field: '%s'", field_name)
+            logger.debug("  -> Path: '%s'", field_path)
+            logger.debug("  -> Value: '%s' (type: %s)", value, type(value).__name__)
+
+        if value:
+            # Sanitize the value to make it safe for use as folder name
+            sanitized = sanitize_filename(str(value))
+            if debug:
+                logger.debug("  -> Sanitized: '%s'", sanitized)
+            if sanitized:  # Only add if something remains after sanitization
+                name_parts.append(sanitized)
+            elif debug:
+                logger.debug("  -> SKIPPED: Empty after sanitization")
+        elif debug:
+            logger.debug("  -> SKIPPED: Empty or missing value")
+
+    if name_parts:
+        folder_name = '_'.join(name_parts)
+        if debug:
+            logger.debug("[FOLDER NAMING DEBUG] Final folder_name: '%s'", folder_name)
+        return folder_name
+
+    # Fall back to GUID if no valid name parts remain after sanitization
+    folder_name = next(ctx.guids)
+    if debug and ctx.resolved_naming_paths:
+        logger.debug("[FOLDER NAMING DEBUG] No valid parts - using GUID: '%s'", folder_name)
+    return folder_name
+
+
+# Set in each worker process by _init_batch_worker
+_batch_context: Optional[BatchContext] = None
+
+
+def _init_batch_worker(request: BatchProcessRequest, target_path: Path):
+    global _batch_context
+    _batch_context = BatchContext(request, target_path)
+
+
+def _process_csv_file(
+    csv_file: Path,
+    stage_tag: Optional[str] = None,
+    ctx: BatchContext = None
+) -> Tuple[int, int, Optional[str], Dict[str, str]]:
+    """
+    Write one XML file per row of a CSV file.
+
+    Returns (processed files, processed records, error message or None, staged
+    outputs); see BatchContext.begin_file.
+    """
+    ctx = ctx or _batch_context
+    ctx.begin_file(stage_tag)
+    processed_records = 0
+    pending = deque()  # (output file, future) in submission order
+
     try:
-        if DEBUG:
-            print(f"\n[BATCH REQUEST DEBUG]")
-            print(f"  folder_naming: '{request.folder_naming}'")
-            print(f"  folder_naming_fields: {request.folder_naming_fields}")
+        logger.info("[CSV] Processing: %s", csv_file.name)
+
+        # Serialize here and hand the bytes to writer threads, so building the
+        # next record overlaps with the previous file writes
+        with ThreadPoolExecutor(max_workers=XML_WRITER_THREADS) as writer:
+            # Latest queued write per output file; rows naming the same folder
+            # must hit the disk in row order so the last row wins, as when
+            # writing sequentially
+            last_write = {}
+
+            def settle():
+                nonlocal processed_records
+                output_file, future = pending.popleft()
+                future.result()
+                if last_write.get(output_file) is future:
+                    del last_write[output_file]
+                processed_records += 1
+
+            # Only parse the columns some mapping reads (at least one, to keep the rows)
+            header = list(pd.read_csv(csv_file, nrows=0).columns)
+            usecols = used_source_columns(header, ctx.compiled_mappings) or [0]
+
+            # Stream the file in chunks; values are kept as the source text
+            for df in pd.read_csv(csv_file, chunksize=CSV_CHUNK_SIZE, dtype=str, usecols=usecols):
+                # Map whole columns, then emit one record per row
+                mapped = apply_mappings_to_dataframe(df, ctx.compiled_mappings)
+                if ctx.use_fields:
+                    # Naming fields without a mapping name the folder as empty values
+                    for path in ctx.naming_paths:
+                        if path not in mapped.columns:
+                            mapped[path] = ''
+
+                # Build straight from the row tuples; no per-row dict
+                # (itertuples yields nothing when no mapping produced a column)
+                columns = list(mapped.columns)
+                build_row = compile_xml_template_builder(
+                    ctx.request.target_schema, "Record", ctx.target_namespace, columns
+                )
+                if ctx.use_fields:
+                    project_naming = _naming_projector([columns.index(path) for path in ctx.naming_paths])
+                rows = mapped.itertuples(index=False, name=None) if columns else repeat((), len(mapped))
+
+                for row in rows:
+                    naming_values = project_naming(row) if ctx.use_fields else ()
+                    folder_name = build_folder_name(ctx, naming_values, csv_file.stem)
+
+                    xml_bytes = serialize_xml(build_row(row))
+                    output_file = ctx.output_file(folder_name)
+                    previous = last_write.get(output_file)
+                    if previous is not None:
+                        previous.result()
+                    future = writer.submit(_write_bytes, output_file, xml_bytes)
+                    last_write[output_file] = future
+                    pending.append((output_file, future))
+
+                    # Bound the queued output; a record counts once it is on disk
+                    if len(pending) >= XML_WRITE_QUEUE_SIZE:
+                        settle()
+
+            while pending:
+                settle()
+        
+        return 1, processed_records, None, ctx.staged
+    
+    except Exception as e:
+        # Writes still queued when the file failed were finished when the writer
+        # pool shut down, and their output is kept: count the ones that landed
+        processed_records += sum(1 for _, future in pending if future.exception() is None)
+        error_msg = f"Error processing {csv_file.name}: {str(e)}"
+        logger.exception("[ERROR] %s", error_msg)
+        return 0, processed_records, error_msg, ctx.staged
+
+
+def _process_xml_file(
+    xml_file: Path,
+    stage_tag: Optional[str] = None,
+    ctx: BatchContext = None
+) -> Tuple[int, int, Optional[str], Dict[str, str]]:
+    """
+    Transform one source XML file into one target XML file.
+
+    Returns (processed files, processed records, error message or None, staged
+    outputs); see BatchContext.begin_file.
+    """
+    ctx = ctx or _batch_context
+    ctx.begin_file(stage_tag)
+    request = ctx.request
+
+    try:
+        logger.info("[XML] Processing: %s", xml_file.name)
+        
+        if xml_file.stat().st_size > MAX_XML_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File too large. Maximum size is {MAX_XML_SIZE / 1024 / 1024}MB"
+            )
+        
+        # Parse once; the flat dict for direct mappings is derived from the tree
+        source_root = ET.parse(str(xml_file), parser=ctx.xml_parser).getroot()
+        source_data = xml_element_to_dict(source_root)
+        
+        transformed = apply_mappings_to_row(source_data, ctx.compiled_mappings)
+        
+        # Create XML structure first (before folder naming)
+        logger.debug("[XML] Creating XML structure...")
+        target_root = ctx.build_xml(transformed)
+        logger.debug("[XML] XML structure created, root tag: %s", target_root.tag if target_root is not None else None)
+
+        # Apply ALL repeating mappings (both modes)
+        logger.debug("[XML] Applying repeating mappings...")
+        instances = apply_repeating_mappings_to_xml(
+            source_root,
+            target_root,
+            request.mappings,
+            request.source_schema,
+            request.target_schema,
+            ctx.constants,
+            target_namespace=ctx.target_namespace,
+            compiled=ctx.compiled_mappings
+        )
+
+        if instances > 0:
+            logger.debug("[XML] Created %s repeating element instances", instances)
+
+        # Now determine folder name AFTER all mappings have been applied
+        def lookup(field_path: str) -> str:
+            # Extract value from XML tree using the namespace-agnostic XPath
+            xpath = ctx.naming_xpaths[field_path]
+            try:
+                elements = target_root.xpath(xpath)
+                return elements[0].text if elements and elements[0].text else ''
+            except Exception as e:
+                logger.debug("[FOLDER NAMING DEBUG - XML] XPath error for %s: %s", field_path, e)
+                return ''
+
+        naming_values = [lookup(path) for path in ctx.naming_paths] if ctx.use_fields else ()
+        folder_name = build_folder_name(ctx, naming_values, xml_file.stem)
 
-        constants = request.constants or []
+        output_file = ctx.output_file(folder_name)
+        logger.debug("[XML] Writing XML to: %s", output_file)
+        write_xml_file(target_root, output_file)
+        logger.debug("[XML] Successfully wrote XML file")
+
+        return 1, 1, None, ctx.staged
+    
+    except Exception as e:
+        error_msg = f"Error processing {xml_file.name}: {str(e)}"
+        logger.exception("[ERROR] %s", error_msg)
+        return 0, 0, error_msg, ctx.staged
+
+
+def _batch_worker_count(files: List[Path]) -> int:
+    """Worker processes for a batch: 1 (run inline) unless it has enough files or bytes for a pool."""
+    max_workers = min(BATCH_MAX_WORKERS, len(files))
+    if max_workers <= 1 or len(files) >= BATCH_POOL_MIN_FILES:
+        return max_workers
+    total_bytes = 0
+    for file in files:
+        try:
+            total_bytes += file.stat().st_size
+        except OSError:
+            continue
+        if total_bytes >= BATCH_POOL_MIN_BYTES:
+            return max_workers
+    return 1
+
+
+def _run_batch_files(
+    worker: Callable[..., Tuple[int, int, Optional[str], Dict[str, str]]],
+    files: List[Path],
+    request: BatchProcessRequest,
+    target_path: Path
+) -> Tuple[int, int, List[str], int]:
+    """
+    Run worker over all files, in a process pool when the batch is large enough
+    (see _batch_worker_count). Files are independent parse -> transform -> write
+    pipelines, so they scale across processes (threads would serialize on the GIL).
+
+    Pool workers stage outputs that another file may also write; they are moved
+    into place here in file order, so as with sequential processing the last
+    file in glob order wins a shared output path.
+
+    Returns (processed files, processed records, errors, error count); errors
+    keeps the first MAX_BATCH_ERRORS messages in file order.
+    """
+    max_workers = _batch_worker_count(files)
+
+    processed_files = 0
+    processed_records = 0
+    errors = []
+    error_count = 0
+
+    def collect(results):
+        nonlocal processed_files, processed_records, error_count
+        for files_done, records_done, error_msg, staged in results:
+            processed_files += files_done
+            processed_records += records_done
+            if error_msg:
+                error_count += 1
+                if len(errors) < MAX_BATCH_ERRORS:
+                    errors.append(error_msg)
+            for output_file, part_file in staged.items():
+                try:
+                    os.replace(part_file, output_file)
+                except FileNotFoundError:
+                    pass  # The write failed before creating the part file
+
+    if max_workers <= 1:
+        ctx = BatchContext(request, target_path)
+        collect(worker(file, ctx=ctx) for file in files)
+    else:
+        # Spawn rather than fork: this runs in a thread of a threaded server
+        # process, and forking there can deadlock the child
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_batch_worker,
+            initargs=(request, target_path)
+        ) as executor:
+            stage_tags = [str(i) for i in range(len(files))]
+            collect(executor.map(worker, files, stage_tags, chunksize=4))
+
+    return processed_files, processed_records, errors, error_count
+
+
+def _run_batch(request: BatchProcessRequest) -> Dict[str, Any]:
+    """Blocking batch body: directory scan, per-file processing and result summary."""
+    try:
+        logger.debug("[BATCH REQUEST DEBUG] folder_naming: '%s', folder_naming_fields: %s",
+                     request.folder_naming, request.folder_naming_fields)
 
         source_path = validate_path(request.source_path)
         target_path = validate_path(request.target_path)
@@ -2312,285 +3277,51 @@ async def batch_process(request: BatchProcessRequest):
         
         target_path.mkdir(parents=True, exist_ok=True)
         
-        processed_files = 0
-        processed_records = 0
-        errors = []
-        
-        direct_mappings = [m for m in request.mappings if not m.is_container]
-        container_mappings = [m for m in request.mappings if m.is_container]
-        
-        target_namespace = getattr(request.target_schema, 'namespace', None)
-        print(f"[BATCH] Target namespace: {target_namespace}")
-        
-        print(f"\n[BATCH] {len(direct_mappings)} direct mappings")
-        print(f"[BATCH] {len(container_mappings)} container mappings")
-        
+        logger.info("[BATCH] Target namespace: %s", getattr(request.target_schema, 'namespace', None))
+        logger.info("[BATCH] %s direct mappings, %s container mappings",
+                    sum(not m.is_container for m in request.mappings),
+                    sum(m.is_container for m in request.mappings))
+
         # Clear path matcher cache
         path_matcher.clear_cache()
         
-        if request.source_schema.type == 'csv':
-            csv_files = list(source_path.glob("*.csv"))[:MAX_BATCH_FILES]
-            
-            if not csv_files:
-                raise HTTPException(status_code=404, detail="No CSV files found")
+        source_type = request.source_schema.type
+        if source_type in ('csv', 'xml'):
+            source_files = list(source_path.glob(f"*.{source_type}"))[:MAX_BATCH_FILES]
             
-            for csv_file in csv_files:
-                try:
-                    print(f"\n[CSV] Processing: {csv_file.name}")
-                    df = pd.read_csv(csv_file)
-                    
-                    for idx, row in df.iterrows():
-                        transformed = apply_mappings_to_row(
-                            row.to_dict(), 
-                            direct_mappings, 
-                            request.source_schema, 
-                            request.target_schema,
-                            constants
-                        )
-                        
-                        if request.folder_naming == "guid":
-                            folder_name = str(uuid.uuid4())
-                        elif request.folder_naming == "filename":
-                            folder_name = csv_file.stem
-                        elif request.folder_naming_fields:
-                            # Build name->path map for target fields
-                            target_name_to_path = {}
-                            for f in request.target_schema.fields:
-                                target_name_to_path[f.name] = f.path
-
-                            if DEBUG:
-                                print(f"\n[FOLDER NAMING DEBUG] folder_naming_fields: {request.folder_naming_fields}")
-                                print(f"[FOLDER NAMING DEBUG] All available field names: {list(target_name_to_path.keys())}")
-                                print(f"[FOLDER NAMING DEBUG] Complete name->path map:")
-                                for name, path in target_name_to_path.items():
-                                    print(f"  '{name}' -> '{path}'")
-
-                            if DEBUG:
-                                print(f"\n[FOLDER NAMING DEBUG] Keys in transformed dict:")
-                                for key in list(transformed.keys())[:20]:  # Show first 20 keys
-                                    print(f"  '{key}'")
-
-                            name_parts = []
-                            for field_name in request.folder_naming_fields:
-                                # Convert field name to path
-                                field_path = target_name_to_path.get(field_name, field_name)
-                                value = transformed.get(field_path, '')
-
-                                if DEBUG:
-                                    print(f"\n[FOLDER NAMING DEBUG] Field: '{field_name}'")
-                                    print(f"  → Path: '{field_path}'")
-                                    print(f"  → Value from transformed: '{value}' (type: {type(value).__name__})")
-
-                                if value:
-                                    # Sanitize the value to make it safe for use as folder name
-                                    sanitized = sanitize_filename(value)
-                                    if DEBUG:
-                                        print(f"  → Sanitized: '{sanitized}'")
-                                    if sanitized:  # Only add if something remains after sanitization
-                                        name_parts.append(sanitized)
-                                    elif DEBUG:
-                                        print(f"  → SKIPPED: Empty after sanitization")
-                                elif DEBUG:
-                                    print(f"  → SKIPPED: Empty or missing value")
-
-                            if DEBUG:
-                                print(f"[FOLDER NAMING DEBUG] Final name_parts: {name_parts}")
-
-                            if name_parts:
-                                folder_name = '_'.join(name_parts)
-                                if DEBUG:
-                                    print(f"[FOLDER NAMING DEBUG] Final folder_name: '{folder_name}'")
-                            else:
-                                # Fall back to GUID if no valid name parts remain after sanitization
-                                folder_name = str(uuid.uuid4())
-                                if DEBUG:
-                                    print(f"[FOLDER NAMING DEBUG] No valid parts - using GUID: '{folder_name}'")
-                        else:
-                            folder_name = str(uuid.uuid4())
-                        
-                        output_folder = target_path / folder_name
-                        output_folder.mkdir(parents=True, exist_ok=True)
-                        
-                        xml_root = create_xml_from_data(
-                            transformed, 
-                            request.target_schema, 
-                            "Record",
-                            namespace=target_namespace
-                        )
-                        tree = ET.ElementTree(xml_root)
-                        output_file = output_folder / f"{folder_name}.xml"
-                        tree.write(str(output_file), encoding='utf-8', xml_declaration=True, pretty_print=True)
-                        
-                        processed_records += 1
-                    
-                    processed_files += 1
-                
-                except Exception as e:
-                    import traceback
-                    error_msg = f"Error processing {csv_file.name}: {str(e)}"
-                    print(f"[ERROR] {error_msg}")
-                    print(traceback.format_exc())
-                    errors.append(error_msg)
-        
-        elif request.source_schema.type == 'xml':
-            xml_files = list(source_path.glob("*.xml"))[:MAX_BATCH_FILES]
-            
-            if not xml_files:
-                raise HTTPException(status_code=404, detail="No XML files found")
-            
-            for xml_file in xml_files:
-                try:
-                    print(f"\n[XML] Processing: {xml_file.name}")
-                    
-                    with open(xml_file, 'rb') as f:
-                        xml_content = f.read()
-                    
-                    parser = create_safe_xml_parser()
-                    source_root = ET.fromstring(xml_content, parser=parser)
-                    
-                    source_data = parse_xml_to_dict(xml_content)
-                    
-                    transformed = apply_mappings_to_row(
-                        source_data,
-                        direct_mappings,
-                        request.source_schema,
-                        request.target_schema,
-                        constants
-                    )
-                    
-                    # Create XML structure first (before folder naming)
-                    print(f"[XML] Creating XML structure...")
-                    target_root = create_xml_from_data(
-                        transformed,
-                        request.target_schema,
-                        "Record",
-                        namespace=target_namespace
-                    )
-                    print(f"[XML] XML structure created, root tag: {target_root.tag if target_root is not None else 'None'}")
-
-                    # Apply ALL repeating mappings (both modes)
-                    print(f"[XML] Applying repeating mappings...")
-                    instances = apply_repeating_mappings_to_xml(
-                        source_root,
-                        target_root,
-                        request.mappings,
-                        request.source_schema,
-                        request.target_schema,
-                        constants,
-                        target_namespace=target_namespace
-                    )
-
-                    if instances > 0:
-                        print(f"[XML] Created {instances} repeating element instances")
-
-                    # Now determine folder name AFTER all mappings have been applied
-                    if request.folder_naming == "guid":
-                        folder_name = str(uuid.uuid4())
-                    elif request.folder_naming == "filename":
-                        folder_name = xml_file.stem
-                    elif request.folder_naming_fields:
-                        # Build name->path map for target fields
-                        target_name_to_path = {}
-                        for f in request.target_schema.fields:
-                            target_name_to_path[f.name] = f.path
-
-                        if DEBUG:
-                            print(f"\n[FOLDER NAMING DEBUG - XML] folder_naming_fields: {request.folder_naming_fields}")
-                            print(f"[FOLDER NAMING DEBUG - XML] All available field names: {list(target_name_to_path.keys())}")
-
-                        name_parts = []
-                        for field_name in request.folder_naming_fields:
-                            # Convert field name to path
-                            field_path = target_name_to_path.get(field_name, field_name)
-
-                            # Extract value from XML tree using XPath
-                            # Build namespace-agnostic XPath
-                            path_parts = field_path.split('/')
-                            xpath_parts = [f'*[local-name()="{part}"]' for part in path_parts]
-                            xpath = '//' + '/'.join(xpath_parts)
-
-                            try:
-                                elements = target_root.xpath(xpath)
-                                value = elements[0].text if elements and len(elements) > 0 and elements[0].text else ''
-                            except Exception as e:
-                                if DEBUG:
-                                    print(f"[FOLDER NAMING DEBUG - XML] XPath error for {field_path}: {e}")
-                                value = ''
-
-                            if DEBUG:
-                                print(f"\n[FOLDER NAMING DEBUG - XML] Field: '{field_name}'")
-                                print(f"  -> Path: '{field_path}'")
-                                print(f"  -> XPath: {xpath}")
-                                print(f"  -> Value from XML: '{value}' (type: {type(value).__name__})")
-
-                            if value:
-                                # Sanitize the value to make it safe for use as folder name
-                                sanitized = sanitize_filename(str(value))
-                                if DEBUG:
-                                    print(f"  -> Sanitized: '{sanitized}'")
-                                if sanitized:
-                                    name_parts.append(sanitized)
-                                elif DEBUG:
-                                    print(f"  -> SKIPPED: Empty after sanitization")
-                            elif DEBUG:
-                                print(f"  -> SKIPPED: Empty or missing value")
+            if not source_files:
+                raise HTTPException(status_code=404, detail=f"No {source_type.upper()} files found")
 
-                        if DEBUG:
-                            print(f"[FOLDER NAMING DEBUG - XML] Final name_parts: {name_parts}")
-
-                        if name_parts:
-                            folder_name = '_'.join(name_parts)
-                            if DEBUG:
-                                print(f"[FOLDER NAMING DEBUG - XML] Final folder_name: '{folder_name}'")
-                        else:
-                            folder_name = str(uuid.uuid4())
-                            if DEBUG:
-                                print(f"[FOLDER NAMING DEBUG - XML] No valid parts - using GUID: '{folder_name}'")
-                    else:
-                        folder_name = str(uuid.uuid4())
-
-                    output_folder = target_path / folder_name
-                    output_folder.mkdir(parents=True, exist_ok=True)
-                    print(f"[XML] Created output folder: {output_folder}")
-
-                    tree = ET.ElementTree(target_root)
-                    output_file = output_folder / f"{folder_name}.xml"
-                    print(f"[XML] Writing XML to: {output_file}")
-                    tree.write(
-                        str(output_file),
-                        encoding='utf-8',
-                        xml_declaration=True,
-                        pretty_print=True
-                    )
-                    print(f"[XML] Successfully wrote XML file")
-
-                    processed_files += 1
-                    processed_records += 1
-                
-                except Exception as e:
-                    import traceback
-                    error_msg = f"Error processing {xml_file.name}: {str(e)}"
-                    print(f"[ERROR] {error_msg}")
-                    print(traceback.format_exc())
-                    errors.append(error_msg)
+            worker = _process_csv_file if source_type == 'csv' else _process_xml_file
+            processed_files, processed_records, errors, error_count = _run_batch_files(
+                worker, source_files, request, target_path
+            )
+        else:
+            processed_files, processed_records, errors, error_count = 0, 0, [], 0
         
         return {
             "success": True,
             "processed_files": processed_files,
             "processed_records": processed_records,
             "output_path": str(target_path),
-            "errors": errors if errors else None
+            "errors": errors if errors else None,
+            "error_count": error_count
         }
     
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"[BATCH ERROR] {e}")
-        print(traceback.format_exc())
+        logger.exception("[BATCH ERROR] %s", e)
         raise HTTPException(status_code=500, detail=f"Batch process error: {str(e)}")
 
 
+@app.post("/api/batch-process")
+async def batch_process(request: BatchProcessRequest):
+    """Process all files with all mapping modes supported"""
+    # The whole batch is blocking file/CPU work: keep it off the event loop
+    return await asyncio.to_thread(_run_batch, request)
+
+
 if __name__ == "__main__":
     import uvicorn
     print("Starting Schmapper Backend v3.1 (All Mapping Modes + Fixed Element Ordering)...")
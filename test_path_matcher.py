@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Tests for partial-path lookups in flattened repeating instances"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import lxml.etree as ET
+import main
+
+
+def find(instance_xml: bytes, field_path: str, field_name: str = None):
+    instance = main._extract_instance_data(ET.fromstring(instance_xml))
+    return main.PathMatcher().find_value(instance, field_path, field_name, suffix_match=True)
+
+
+def test_partial_path_takes_most_recently_written_match():
+    # A/X/Y is written again after B/X/Y, so its value is the latest match for X/Y
+    instance_xml = b"<Line><A><X><Y>1</Y></X></A><B><X><Y>2</Y></X></B><A><X><Y>3</Y></X></A></Line>"
+    assert find(instance_xml, 'Other/X/Y') == '3'
+
+
+def test_partial_path_without_repeated_paths():
+    instance_xml = b"<Line><A><X><Y>1</Y></X></A><B><X><Y>2</Y></X></B></Line>"
+    assert find(instance_xml, 'Other/X/Y') == '2'
+    assert find(instance_xml, 'Other/A/X/Y') == '1'
+
+
+def test_partial_attribute_path():
+    instance_xml = (b'<Line><P><A><X code="1"/></A></P><Q><A><X code="2"/></A></Q>'
+                    b'<P><A><X code="3"/></A></P></Line>')
+    assert find(instance_xml, 'Other/A/X/@code') == '3'
+
+
+def test_name_match_takes_first_written_path():
+    instance_xml = b"<Line><A><Y>1</Y></A><B><Y>2</Y></B><A><Y>3</Y></A></Line>"
+    assert find(instance_xml, 'Other/Z', 'y') == '3'
+
+
+if __name__ == '__main__':
+    test_partial_path_takes_most_recently_written_match()
+    test_partial_path_without_repeated_paths()
+    test_partial_attribute_path()
+    test_name_match_takes_first_written_path()
+    print("OK")
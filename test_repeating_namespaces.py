@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Regression tests for repeating mappings over namespaced source documents"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import lxml.etree as ET
+import main
+
+
+SOURCE_SCHEMA = main.Schema(
+    name='source', type='xml',
+    fields=[],
+    repeating_elements=[{
+        'id': 'rep-src', 'path': 'Doc/Lines/Line', 'wrapper_path': 'Doc/Lines/Line',
+        'fields': [{'id': 'src-code', 'name': 'Code', 'type': 'string', 'path': 'Doc/Lines/Line/Code'}],
+    }],
+)
+
+TARGET_SCHEMA = main.Schema(
+    name='target', type='xml',
+    fields=[],
+    repeating_elements=[{
+        'id': 'rep-tgt', 'path': 'Record/Items/Item', 'wrapper_path': 'Record/Items/Item',
+        'fields': [{'id': 'tgt-code', 'name': 'Code', 'type': 'string', 'path': 'Record/Items/Item/Code'}],
+    }],
+)
+
+MAPPINGS = [
+    main.Mapping(id='c1', source=[], target='', is_container=True, loop_element_path='Doc/Lines/Line',
+                 target_wrapper_path='Record/Items/Item', aggregation='repeat'),
+    main.Mapping(id='c1a', source=['src-code'], target='tgt-code', parent_repeat_container='c1'),
+]
+
+
+def map_codes(source_xml: bytes):
+    source_root = ET.fromstring(source_xml, parser=main.create_safe_xml_parser())
+    target_root = ET.Element('Record')
+    main.apply_repeating_mappings_to_xml(source_root, target_root, MAPPINGS, SOURCE_SCHEMA, TARGET_SCHEMA, [])
+    return [elem.text for elem in target_root.iter('Code')]
+
+
+def test_loop_elements_in_several_namespaces():
+    source_xml = b"""<Doc xmlns="urn:a">
+        <Lines><Line><Code>A1</Code></Line></Lines>
+        <Wrap xmlns="urn:b"><Lines><Line><Code>B1</Code></Line></Lines></Wrap>
+    </Doc>"""
+    assert map_codes(source_xml) == ['A1', 'B1']
+
+
+def test_default_namespace_with_prefixed_declarations():
+    source_xml = b"""<Doc xmlns="urn:a" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+        <Lines><Line><Code>A1</Code></Line><Line><Code>A2</Code></Line></Lines>
+    </Doc>"""
+    assert map_codes(source_xml) == ['A1', 'A2']
+
+
+def test_only_prefixed_declarations():
+    source_xml = b"""<Doc xmlns:x="urn:x"><Lines><Line><Code>A1</Code></Line></Lines></Doc>"""
+    assert map_codes(source_xml) == ['A1']
+
+
+if __name__ == '__main__':
+    test_loop_elements_in_several_namespaces()
+    test_default_namespace_with_prefixed_declarations()
+    test_only_prefixed_declarations()
+    print("OK")